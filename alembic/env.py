@@ -4,13 +4,11 @@ import os
 import sys
 from alembic import context
 from sqlalchemy import engine_from_config
-from sqlalchemy import pool
 
 # Add parent directory to Python path for imports
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from app.models.database import Base
-from app.core.config import Settings
+from app.models.database import Base, configure_sqlite_engine
 
 # this is the Alembic Config object
 config = context.config
@@ -22,9 +20,17 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 def get_url():
-    settings = Settings()
-    if settings.env == "production":
-        return settings.database_url
+    # Read ENV/DATABASE_URL straight from the environment when present so
+    # migrations don't pay for validating the full application Settings
+    from app.core.config import get_settings
+    env = os.environ.get("ENV")
+    if env is None:
+        env = get_settings().env
+    if env == "production":
+        database_url = os.environ.get("DATABASE_URL")
+        if database_url is None:
+            database_url = get_settings().database_url
+        return database_url
     else:
         db_dir = os.path.join(os.path.dirname(__file__), "..", "data")
         os.makedirs(db_dir, exist_ok=True)
@@ -62,8 +68,10 @@ def run_migrations_online() -> None:
     connectable = engine_from_config(
         configuration,
         prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+        pool_size=1,
+        pool_pre_ping=True,
     )
+    configure_sqlite_engine(connectable)
 
     with connectable.connect() as connection:
         context.configure(
@@ -0,0 +1,31 @@
+"""Tune indexes on the builds table.
+
+Revision ID: 132585a038be
+Revises: 24d507e55555
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '132585a038be'
+down_revision = '24d507e55555'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # The (job_name, build_number) lookup key declared on the model was never
+    # created by the initial migration; its leading column also makes the
+    # single-column job_name index redundant
+    op.create_index('uix_build_job_number', 'builds', ['job_name', 'build_number'], unique=True)
+    op.drop_index('ix_builds_job_name', table_name='builds')
+
+    # Serve newest-first listings of builds
+    op.create_index('ix_builds_timestamp', 'builds', [sa.text('timestamp DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_builds_timestamp', table_name='builds')
+    op.create_index('ix_builds_job_name', 'builds', ['job_name'], unique=False)
+    op.drop_index('uix_build_job_number', table_name='builds')
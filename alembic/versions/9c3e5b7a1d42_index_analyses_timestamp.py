@@ -0,0 +1,21 @@
+"""Index analyses by timestamp for retention cleanup.
+
+Revision ID: 9c3e5b7a1d42
+Revises: f701f2d9f05a
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5b7a1d42'
+down_revision = 'f701f2d9f05a'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index('ix_analyses_timestamp', 'analyses', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analyses_timestamp', table_name='analyses')
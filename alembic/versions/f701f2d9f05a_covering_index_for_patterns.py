@@ -0,0 +1,37 @@
+"""Replace the patterns job_name index with a covering index.
+
+Revision ID: f701f2d9f05a
+Revises: 132585a038be
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f701f2d9f05a'
+down_revision = '132585a038be'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.drop_index('ix_patterns_job_name', table_name='patterns')
+
+    # Pattern listings filter on job_name/is_active and read frequency and
+    # pattern, so carry those columns in the index for index-only scans
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_patterns_cover', 'patterns',
+            ['job_name', 'is_active', sa.text('last_seen DESC')],
+            postgresql_include=['frequency', 'pattern']
+        )
+    else:
+        op.create_index(
+            'ix_patterns_cover', 'patterns',
+            ['job_name', 'is_active', sa.text('last_seen DESC'), 'frequency', 'pattern']
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_patterns_cover', table_name='patterns')
+    op.create_index('ix_patterns_job_name', 'patterns', ['job_name'], unique=False)
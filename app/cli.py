@@ -1,40 +1,105 @@
 """Command Line Interface for Jenkins Build Analyzer."""
-from typing import Optional, List
-import asyncio
+from typing import TYPE_CHECKING, Optional, List
 from datetime import datetime
+from functools import lru_cache
+import heapq
 import typer
-from rich.console import Console
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from loguru import logger
 
-from app.core.config import Settings
-from app.core.logging import configure_logging
-from app.services.jenkins_client import JenkinsClient
-from app.services.bedrock_client import BedrockClient
-from app.services.build_analyzer import BuildAnalyzer
-from app.services.agent_manager import AgentManager
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.table import Table
+    from app.core.config import Settings
+    from app.services.agent_manager import AgentManager
+    from app.services.database import DatabaseService
 
 app = typer.Typer(help="Jenkins Build Analyzer CLI")
-console = Console()
 
 # Shared service instances
-settings: Optional[Settings] = None
-agent_manager: Optional[AgentManager] = None
+settings: Optional["Settings"] = None
+db_service: Optional["DatabaseService"] = None
+agent_manager: Optional["AgentManager"] = None
+
+@lru_cache(maxsize=1)
+def _get_console() -> "Console":
+    """Return the shared Rich console, importing Rich on first use."""
+    from rich.console import Console
+    return Console()
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+def _patterns_table() -> "Table":
+    """Create the column layout used by the patterns command."""
+    from rich.table import Table
+
+    table = Table(title="Learned Build Patterns")
+    table.add_column("Job", style="cyan")
+    table.add_column("Pattern", style="green")
+    table.add_column("Frequency", justify="right")
+    table.add_column("Last Seen", justify="right")
+    return table
+
+def _actions_table() -> "Table":
+    """Create the column layout used by the actions command."""
+    from rich.table import Table
+
+    table = Table(title="Agent Actions")
+    table.add_column("Time", style="cyan")
+    table.add_column("Job", style="blue")
+    table.add_column("Build", justify="right")
+    table.add_column("Action", style="green")
+    table.add_column("Result")
+    return table
 
 @app.callback()
 def init_services():
     """Initialize shared services."""
-    global settings, agent_manager
+    global settings
     if not settings:
-        settings = Settings()
+        from app.core.config import get_settings
+        from app.core.logging import configure_logging
+
+        settings = get_settings()
         configure_logging(settings)
-        
-        # Initialize services
+
+def _install_uvloop():
+    """Use uvloop for the event loop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        logger.debug("uvloop not available, using the default asyncio event loop")
+        return
+    import asyncio
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+def _get_db_service() -> "DatabaseService":
+    """Create the database service on first use."""
+    global db_service
+    if db_service is None:
+        from app.services.database import DatabaseService
+
+        db_service = DatabaseService(settings)
+    return db_service
+
+def _get_agent_manager() -> "AgentManager":
+    """Build the agent and its clients on first use.
+
+    The Jenkins and Bedrock clients (and boto3 behind them) are only imported
+    by commands that actually need them. The database is not touched until
+    the agent is initialized.
+    """
+    global agent_manager
+    if agent_manager is None:
+        from app.services.jenkins_client import JenkinsClient
+        from app.services.bedrock_client import BedrockClient
+        from app.services.build_analyzer import BuildAnalyzer
+        from app.services.agent_manager import AgentManager
+
         jenkins_client = JenkinsClient(settings)
         bedrock_client = BedrockClient(settings)
         build_analyzer = BuildAnalyzer(jenkins_client, bedrock_client)
-        agent_manager = AgentManager(jenkins_client, bedrock_client, build_analyzer)
+        agent_manager = AgentManager(jenkins_client, bedrock_client, build_analyzer, _get_db_service())
+    return agent_manager
 
 @app.command()
 def start(
@@ -42,22 +107,31 @@ def start(
     jobs: List[str] = typer.Option(None, "--job", "-j", help="Monitor specific jobs only"),
 ):
     """Start the Jenkins Build Analyzer agent."""
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    async def run_agent():
+        manager = _get_agent_manager()
+        await manager.initialize()
+        await manager.start()
+
     try:
         if monitor:
-            console.print("[green]Starting Jenkins Build Analyzer...[/green]")
+            _get_console().print("[green]Starting Jenkins Build Analyzer...[/green]")
             with Progress(
                 SpinnerColumn(),
                 TextColumn("[progress.description]{task.description}"),
-                console=console,
+                console=_get_console(),
             ) as progress:
                 progress.add_task("Initializing monitoring tasks...", total=None)
-                # Run the agent manager
-                asyncio.run(agent_manager.start())
+                # Run the agent manager once its database and patterns are ready
+                _install_uvloop()
+                asyncio.run(run_agent())
         else:
-            console.print("[yellow]Running in analysis-only mode[/yellow]")
+            _get_console().print("[yellow]Running in analysis-only mode[/yellow]")
             
     except KeyboardInterrupt:
-        console.print("[yellow]Shutting down...[/yellow]")
+        _get_console().print("[yellow]Shutting down...[/yellow]")
     except Exception as e:
         logger.error(f"Failed to start agent: {e}")
         raise typer.Exit(1)
@@ -69,14 +143,18 @@ def analyze(
     compare_last: bool = typer.Option(True, "--compare/--no-compare", help="Compare with last successful build"),
 ):
     """Analyze a specific Jenkins build."""
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+
     try:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
-            console=console,
+            console=_get_console(),
         ) as progress:
             task = progress.add_task(f"Analyzing {job_name} #{build_number}...", total=None)
-            analysis = asyncio.run(agent_manager.analyzer.analyze_build(job_name, build_number))
+            analysis = asyncio.run(_get_agent_manager().analyzer.analyze_build(job_name, build_number))
             progress.update(task, completed=True)
             
         # Display results in a table
@@ -91,38 +169,73 @@ def analyze(
         if analysis.recommendations:
             table.add_row("Recommendations", "\\n".join(analysis.recommendations))
             
-        console.print(table)
+        _get_console().print(table)
             
     except Exception as e:
         logger.error(f"Failed to analyze build: {e}")
         raise typer.Exit(1)
 
+@app.command()
+def analyze_logs(
+    paths: List[str] = typer.Argument(..., help="Saved console log files"),
+    workers: Optional[int] = typer.Option(None, "--workers", "-w", help="Worker processes (default: CPU count)"),
+):
+    """Analyze saved console logs in parallel without contacting Jenkins."""
+    from rich.table import Table
+    from app.utils.log_analyzer import analyze_log_files
+
+    try:
+        results = analyze_log_files(paths, max_workers=workers)
+        
+        table = Table(title="Console Log Analysis")
+        table.add_column("File", style="cyan")
+        table.add_column("Failed Tests", justify="right")
+        table.add_column("Total Time", justify="right")
+        table.add_column("Dependency Issues", justify="right")
+        table.add_column("Compilation Issues", justify="right")
+        
+        for path, (test_results, timing_info, dependency_issues, compilation_issues) in zip(paths, results):
+            total_time = timing_info['total_time']
+            table.add_row(
+                path,
+                str(len(test_results['failed_tests'])),
+                f"{total_time:.1f}s" if total_time is not None else "-",
+                str(len(dependency_issues)),
+                str(len(compilation_issues))
+            )
+            
+        _get_console().print(table)
+            
+    except Exception as e:
+        logger.error(f"Failed to analyze logs: {e}")
+        raise typer.Exit(1)
+
 @app.command()
 def patterns(
     job_name: Optional[str] = typer.Argument(None, help="Filter patterns by job name"),
 ):
     """View learned build failure patterns."""
+    import asyncio
+    from rich.live import Live
+
+    async def stream_patterns():
+        db = _get_db_service()
+        table = _patterns_table()
+        try:
+            # Rows are rendered as they stream in rather than after the full fetch
+            with Live(table, console=_get_console()):
+                async for pattern in db.iter_patterns(job_name):
+                    table.add_row(
+                        pattern['job_name'],
+                        pattern['pattern'],
+                        str(pattern['frequency']),
+                        pattern['last_seen'].strftime(_TIME_FORMAT)
+                    )
+        finally:
+            await db.close()
+
     try:
-        patterns = agent_manager.pattern_database
-        if job_name:
-            patterns = {job_name: patterns.get(job_name, [])}
-            
-        table = Table(title="Learned Build Patterns")
-        table.add_column("Job", style="cyan")
-        table.add_column("Pattern", style="green")
-        table.add_column("Frequency", justify="right")
-        table.add_column("Last Seen", justify="right")
-        
-        for job, job_patterns in patterns.items():
-            for pattern in job_patterns:
-                table.add_row(
-                    job,
-                    pattern['pattern'],
-                    str(pattern['frequency']),
-                    pattern['last_seen'].strftime("%Y-%m-%d %H:%M")
-                )
-                
-        console.print(table)
+        asyncio.run(stream_patterns())
             
     except Exception as e:
         logger.error(f"Failed to fetch patterns: {e}")
@@ -137,11 +250,10 @@ def actions(
     """View automated actions taken by the agent."""
     try:
         actions = []
-        for key, build_actions in agent_manager.action_history.items():
-            job, build = key.split('#')
+        for (job, build), build_actions in _get_agent_manager().action_history.items():
             if job_name and job != job_name:
                 continue
-            if build_number and int(build) != build_number:
+            if build_number and build != build_number:
                 continue
             
             for action in build_actions:
@@ -153,27 +265,20 @@ def actions(
                     'timestamp': datetime.fromisoformat(action['timestamp'])
                 })
                 
-        # Sort by timestamp descending and limit
-        actions.sort(key=lambda x: x['timestamp'], reverse=True)
-        actions = actions[:limit]
+        # Keep only the newest `limit` actions without sorting all of them
+        actions = heapq.nlargest(limit, actions, key=lambda x: x['timestamp'])
             
-        table = Table(title="Agent Actions")
-        table.add_column("Time", style="cyan")
-        table.add_column("Job", style="blue")
-        table.add_column("Build", justify="right")
-        table.add_column("Action", style="green")
-        table.add_column("Result")
+        rows = [
+            (action['timestamp'].strftime(_TIME_FORMAT), action['job'],
+             action['build'], action['type'], action['result'])
+            for action in actions
+        ]
         
-        for action in actions:
-            table.add_row(
-                action['timestamp'].strftime("%Y-%m-%d %H:%M"),
-                action['job'],
-                action['build'],
-                action['type'],
-                action['result']
-            )
+        table = _actions_table()
+        for row in rows:
+            table.add_row(*map(str, row))
                 
-        console.print(table)
+        _get_console().print(table)
             
     except Exception as e:
         logger.error(f"Failed to fetch actions: {e}")
@@ -182,7 +287,10 @@ def actions(
 @app.command()
 def stats():
     """Show system statistics and metrics."""
+    from rich.table import Table
+
     try:
+        agent_manager = _get_agent_manager()
         stats_table = Table(title="System Statistics")
         stats_table.add_column("Metric", style="cyan")
         stats_table.add_column("Value", style="green")
@@ -197,18 +305,18 @@ def stats():
         )
         stats_table.add_row(
             "Known Patterns",
-            str(sum(len(patterns) for patterns in agent_manager.pattern_database.values()))
+            str(agent_manager.pattern_total)
         )
         stats_table.add_row(
             "Actions Taken",
-            str(sum(len(actions) for actions in agent_manager.action_history.values()))
+            str(agent_manager.action_total)
         )
         stats_table.add_row(
             "Learning Enabled",
             "✓" if agent_manager.learning_enabled else "✗"
         )
         
-        console.print(stats_table)
+        _get_console().print(stats_table)
             
     except Exception as e:
         logger.error(f"Failed to fetch statistics: {e}")
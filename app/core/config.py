@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -10,6 +11,11 @@ class Settings(BaseSettings):
     jenkins_url: str = Field(..., description="Jenkins server URL")
     jenkins_user: str = Field(..., description="Jenkins username")
     jenkins_token: str = Field(..., description="Jenkins API token")
+    jenkins_concurrency: int = Field(default=8, description="Maximum concurrent Jenkins API requests")
+    console_tail_bytes: int = Field(
+        default=1_048_576,
+        description="Bytes fetched from the end of a console log (0 fetches the whole log)"
+    )
     
     # Database Settings
     database_url: str = Field(
@@ -22,6 +28,10 @@ class Settings(BaseSettings):
     aws_secret_access_key: str = Field(..., description="AWS secret access key")
     aws_region: str = Field(..., description="AWS region")
     bedrock_model_id: str = Field(..., description="Amazon Bedrock model ID")
+    bedrock_cache_dir: str = Field(
+        default="~/.cache/jenkins-sentinel/bedrock",
+        description="Directory for cached Bedrock analyses (empty to disable)"
+    )
     
     # Application Settings
     log_level: str = Field(default="INFO", description="Logging level")
@@ -36,3 +46,9 @@ class Settings(BaseSettings):
         case_sensitive=False,
         env_file_encoding="utf-8"
     )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
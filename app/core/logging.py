@@ -16,7 +16,8 @@ def configure_logging(settings: Settings) -> None:
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
     )
     
-    # Add file handler for persistent logging
+    # Add file handler for persistent logging; enqueue moves file writes to a
+    # background thread so request handlers never block on disk I/O
     os.makedirs("logs", exist_ok=True)
     logger.add(
         "logs/agent.log",
@@ -24,10 +25,11 @@ def configure_logging(settings: Settings) -> None:
         compression="zip",  # Compress rotated files
         retention="1 week",  # Keep logs for 1 week
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{line} - {message}",
-        level=settings.log_level
+        level=settings.log_level,
+        enqueue=True
     )
     
-    # Configure error reporting
+    # Configure error reporting (level threshold only, no per-record filter)
     logger.add(
         "logs/errors.log",
         rotation="1 day",
@@ -35,7 +37,7 @@ def configure_logging(settings: Settings) -> None:
         retention="1 month",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{line} - {message}",
         level="ERROR",
-        filter=lambda record: record["level"].name == "ERROR"
+        enqueue=True
     )
     
     # Log startup configuration
@@ -1,11 +1,13 @@
 """FastAPI endpoints for the build analyzer service."""
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, Dict, Any, List
+from fastapi.responses import ORJSONResponse
+from typing import Optional, Dict, Any, Tuple
 import asyncio
-from datetime import datetime
+import time
+from urllib.parse import unquote
 from loguru import logger
-from app.core.config import Settings
+from app.core.config import get_settings
 from app.core.logging import configure_logging
 from app.services.jenkins_client import JenkinsClient
 from app.services.bedrock_client import BedrockClient
@@ -13,20 +15,21 @@ from app.services.build_analyzer import BuildAnalyzer
 from app.services.database import DatabaseService
 from app.services.agent_manager import AgentManager
 from app.models.build import BuildInfo, BuildAnalysis
+from app.utils.clock import now_iso
 
-app = FastAPI(title="Jenkins Build Analyzer")
+app = FastAPI(title="Jenkins Build Analyzer", default_response_class=ORJSONResponse)
 
 # Setup CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, replace with specific origins
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],  # Only verbs the API exposes
+    allow_headers=["Authorization", "Content-Type"],
 )
 
 # Load configuration
-settings = Settings()
+settings = get_settings()
 
 # Configure logging
 configure_logging(settings)
@@ -37,19 +40,20 @@ jenkins_client = JenkinsClient(settings)
 bedrock_client = BedrockClient(settings)
 build_analyzer = BuildAnalyzer(jenkins_client, bedrock_client)
 db_service = DatabaseService(settings)
+agent_manager: Optional[AgentManager] = None
+
+# Readiness probes hit Jenkins and AWS; reuse the last outcome for a short window
+READY_CACHE_SECONDS = min(settings.cache_ttl, 30)
+_ready_cache: Tuple[float, Optional[str]] = (float("-inf"), None)
 
 # Initialize and start services that require async setup
 @app.on_event("startup")
 async def startup_event():
     try:
-        # Initialize database
-        logger.info("Initializing database")
-        await db_service.init_db()
-        
-        # Initialize agent manager
+        # Initialize the database and agent manager; patterns are loaded before it is published
         logger.info("Initializing agent manager")
         global agent_manager
-        agent_manager = AgentManager(jenkins_client, bedrock_client, build_analyzer, db_service)
+        agent_manager = await AgentManager.create(jenkins_client, bedrock_client, build_analyzer, db_service)
         
         # Start agent manager
         logger.info("Starting agent manager")
@@ -60,6 +64,12 @@ async def startup_event():
         # Re-raise the error so FastAPI can handle it
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Closing database connections")
+    await db_service.close()
+    jenkins_client.close()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -69,20 +79,28 @@ async def health_check():
 @app.get("/ready")
 async def readiness_check():
     """Readiness check endpoint."""
-    try:
-        # Check Jenkins connection
-        logger.debug("Checking Jenkins connection")
-        jenkins_client.server.get_whoami()
+    global _ready_cache
+    checked_at, error = _ready_cache
+    if time.monotonic() - checked_at >= READY_CACHE_SECONDS:
+        try:
+            # The Jenkins and boto3 clients are blocking; keep them off the event loop
+            logger.debug("Checking Jenkins connection")
+            await asyncio.to_thread(jenkins_client.server.get_whoami)
 
-        # Check AWS credentials
-        logger.debug("Checking AWS credentials")
-        bedrock_client.client.list_foundation_models()
-        
-        logger.debug("Readiness check passed")
-        return {"status": "ready"}
-    except Exception as e:
-        logger.error(f"Readiness check failed: {e}")
-        raise HTTPException(status_code=503, detail=str(e))
+            # Check AWS credentials
+            logger.debug("Checking AWS credentials")
+            await asyncio.to_thread(bedrock_client.client.list_foundation_models)
+            
+            logger.debug("Readiness check passed")
+            error = None
+        except Exception as e:
+            logger.error(f"Readiness check failed: {e}")
+            error = str(e)
+        _ready_cache = (time.monotonic(), error)
+
+    if error is not None:
+        raise HTTPException(status_code=503, detail=error)
+    return {"status": "ready"}
 
 @app.post("/api/v1/analyze")
 async def analyze_build(
@@ -106,6 +124,31 @@ async def analyze_build(
         logger.error(f"Failed to start analysis for {job_name} #{build_number}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _job_name_from_url(url: str) -> Optional[str]:
+    """Recover a full job name from a Jenkins job URL path like job/folder/job/name/."""
+    parts = url.strip("/").split("/")
+    names = [unquote(parts[i + 1]) for i in range(len(parts) - 1) if parts[i] == "job"]
+    return "/".join(names) or None
+
+@app.post("/api/v1/webhook")
+async def jenkins_webhook(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Receive build notifications from the Jenkins Notification plugin."""
+    build = payload.get("build") or {}
+    phase = build.get("phase")
+    if phase not in (None, "COMPLETED", "FINALIZED"):
+        return {"status": "ignored", "phase": phase}
+
+    job_name = _job_name_from_url(payload.get("url", "")) or payload.get("name")
+    build_number = build.get("number")
+    if not job_name or not isinstance(build_number, int):
+        raise HTTPException(status_code=400, detail="Payload must include a job name and build number")
+
+    if agent_manager is None or not agent_manager.notify_build(job_name, build_number):
+        raise HTTPException(status_code=503, detail="Agent manager is not running")
+
+    logger.info(f"Queued webhook build {job_name} #{build_number}")
+    return {"status": "queued", "job": job_name, "build": build_number}
+
 @app.post("/api/v1/analyze/failure")
 async def analyze_failure(
     job_name: str,
@@ -123,17 +166,30 @@ async def analyze_failure(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/patterns")
-async def get_patterns() -> Dict[str, List[Dict[str, Any]]]:
+async def get_patterns() -> Dict[str, Any]:
     """Get the current pattern database showing what the agent has learned."""
     try:
         return {
-            "patterns": agent_manager.pattern_database,
-            "total_patterns": sum(len(patterns) for patterns in agent_manager.pattern_database.values()),
-            "last_updated": datetime.now().isoformat()
+            "patterns": {
+                job_name: list(patterns.values())
+                for job_name, patterns in agent_manager.pattern_database.items()
+            },
+            "total_patterns": agent_manager.pattern_total,
+            "last_updated": now_iso()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/cache/invalidate")
+async def invalidate_job(
+    job_name: str = Query(..., description="Name of the Jenkins job")
+) -> Dict[str, Any]:
+    """Drop the agent's cached analyses and patterns for a job."""
+    if agent_manager is None:
+        raise HTTPException(status_code=503, detail="Agent manager is not running")
+    agent_manager.invalidate(job_name)
+    return {"status": "invalidated", "job": job_name}
+
 @app.get("/api/v1/actions")
 async def get_actions(
     job_name: str = Query(..., description="Name of the Jenkins job"),
@@ -141,14 +197,15 @@ async def get_actions(
 ) -> Dict[str, Any]:
     """Get actions taken by the agent for a specific build."""
     cache_key = f"{job_name}#{build_number}"
-    if cache_key not in agent_manager.analysis_cache:
+    # Single lookup: TTLCache entries can expire between a check and a read
+    analysis = agent_manager.analysis_cache.get(cache_key)
+    if analysis is None:
         raise HTTPException(status_code=404, detail="Build analysis not found")
     
-    analysis = agent_manager.analysis_cache[cache_key]
     return {
         "build_info": analysis.build_info,
-        "actions_taken": agent_manager.action_history.get(cache_key, []),
-        "timestamp": datetime.now().isoformat()
+        "actions_taken": agent_manager.action_history.get((job_name, build_number), []),
+        "timestamp": now_iso()
     }
 
 @app.get("/api/v1/learning/status")
@@ -157,9 +214,9 @@ async def get_learning_status() -> Dict[str, Any]:
     return {
         "learning_enabled": agent_manager.learning_enabled,
         "total_builds_analyzed": len(agent_manager.analysis_cache),
-        "pattern_database_size": sum(len(patterns) for patterns in agent_manager.pattern_database.values()),
+        "pattern_database_size": agent_manager.pattern_total,
         "active_monitors": len(agent_manager.active_monitors),
-        "last_learning_update": datetime.now().isoformat()
+        "last_learning_update": now_iso()
     }
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
 
@@ -22,6 +22,8 @@ class BuildInfo(BaseModel):
         url: URL to the build in Jenkins UI
         console_log: Build console output
     """
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     job_name: str
     build_number: int
     result: str
@@ -33,6 +35,8 @@ class BuildInfo(BaseModel):
 
 
 class BuildAnalysis(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     build_info: BuildInfo
     last_success: Optional[BuildInfo]
     error_patterns: List[Dict[str, Any]]
@@ -44,6 +48,8 @@ class BuildAnalysis(BaseModel):
 
 
 class BuildComparison(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     failed_build: BuildInfo
     successful_build: BuildInfo
     parameter_diff: Dict[str, Any]
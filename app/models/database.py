@@ -1,28 +1,102 @@
 """SQLAlchemy models for the build analyzer database."""
 from datetime import datetime
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+import orjson
 import sqlalchemy
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Text, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Text, Boolean, Index
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.models.build import BuildInfo, BuildAnalysis
 
 Base = declarative_base()
 
+# Applied to every new SQLite connection: WAL lets readers and the writer
+# proceed concurrently, and the remaining settings trade fsync durability
+# and memory for much cheaper writes on the development database.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=2147483648",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+def configure_sqlite_engine(engine: Engine) -> None:
+    """Register a connect hook issuing the SQLite PRAGMAs on an engine.
+
+    No-op for other dialects. Async engines should pass ``engine.sync_engine``.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+def _json_serializer(value: Any) -> str:
+    """Serialize JSON column values with orjson."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+def create_db_engine(db_url: str, echo: bool = False) -> AsyncEngine:
+    """Create the shared async engine for the application.
+
+    Server databases get a persistent connection pool so requests reuse
+    established connections instead of reconnecting per operation. All JSON
+    columns round-trip through orjson instead of the stdlib json module.
+    """
+    if db_url.startswith("sqlite"):
+        engine = create_async_engine(
+            db_url,
+            echo=echo,
+            json_serializer=_json_serializer,
+            json_deserializer=orjson.loads
+        )
+    else:
+        engine = create_async_engine(
+            db_url,
+            echo=echo,
+            json_serializer=_json_serializer,
+            json_deserializer=orjson.loads,
+            pool_size=25,
+            max_overflow=25,
+            pool_pre_ping=True,
+            pool_recycle=1800
+        )
+    configure_sqlite_engine(engine.sync_engine)
+    return engine
+
+async def _insert_rows(session: AsyncSession, model: Any, rows: List[Dict[str, Any]],
+                       returning: bool) -> List[int]:
+    """Insert rows as one multi-row statement, optionally returning their ids in order."""
+    if returning:
+        result = await session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+        return list(result)
+    await session.execute(insert(model), rows)
+    return []
+
 class Build(Base):
     """Build information table."""
     __tablename__ = "builds"
     
     id = Column(Integer, primary_key=True)
-    job_name = Column(String, nullable=False, index=True)
+    job_name = Column(String, nullable=False)
     build_number = Column(Integer, nullable=False)
     result = Column(String, nullable=False)
     timestamp = Column(DateTime, nullable=False)
     duration = Column(Integer)
     parameters = Column(JSON)
     url = Column(String)
-    console_log = Column(Text)
+    # Console logs can be megabytes; load only when explicitly requested
+    console_log = deferred(Column(Text))
     
     # One-to-one relationship with Analysis, using build_id as the primary relationship
     analysis = relationship(
@@ -42,7 +116,8 @@ class Build(Base):
     )
     
     __table_args__ = (
-        UniqueConstraint('job_name', 'build_number', name='uix_build_job_number'),
+        Index('uix_build_job_number', 'job_name', 'build_number', unique=True),
+        Index('ix_builds_timestamp', timestamp.desc()),
         {'extend_existing': True}
     )
     
@@ -60,6 +135,18 @@ class Build(Base):
             console_log=build_info.console_log
         )
 
+    @classmethod
+    async def bulk_insert(cls, session: AsyncSession, build_infos: List[BuildInfo],
+                          returning: bool = False) -> List[int]:
+        """Insert many builds with a single executemany, bypassing the unit of work.
+
+        Callers own the transaction and should chunk by ``settings.batch_size``.
+        With ``returning`` the new primary keys are returned in input order.
+        """
+        if not build_infos:
+            return []
+        return await _insert_rows(session, cls, [build_info.model_dump() for build_info in build_infos], returning)
+
 class Analysis(Base):
     """Build analysis results table."""
     __tablename__ = "analyses"
@@ -81,6 +168,11 @@ class Analysis(Base):
         back_populates="analysis"
     )
     
+    # Retention cleanup deletes by age
+    __table_args__ = (
+        Index('ix_analyses_timestamp', 'timestamp'),
+    )
+    
     @classmethod
     def from_build_analysis(cls, analysis: BuildAnalysis, build_id: int, 
                           last_success_id: Optional[int] = None) -> "Analysis":
@@ -101,13 +193,20 @@ class Pattern(Base):
     __tablename__ = "patterns"
     
     id = Column(Integer, primary_key=True)
-    job_name = Column(String, nullable=False, index=True)
+    job_name = Column(String, nullable=False)
     pattern = Column(String, nullable=False)
     frequency = Column(Integer, nullable=False, default=1)
     last_seen = Column(DateTime, nullable=False)
     solution = Column(JSON, nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
     
+    # Covering index for pattern listings; on SQLite the migration appends
+    # the included columns to the key instead
+    __table_args__ = (
+        Index('ix_patterns_cover', 'job_name', 'is_active', last_seen.desc(),
+              postgresql_include=['frequency', 'pattern']),
+    )
+    
     @classmethod
     def from_dict(cls, job_name: str, pattern_dict: Dict[str, Any]) -> "Pattern":
         """Create a Pattern record from a dictionary."""
@@ -119,6 +218,25 @@ class Pattern(Base):
             solution=pattern_dict.get('solution')
         )
 
+    @classmethod
+    async def bulk_insert(cls, session: AsyncSession,
+                          patterns: List[Tuple[str, Dict[str, Any]]],
+                          returning: bool = False) -> List[int]:
+        """Insert many ``(job_name, pattern_dict)`` pairs with a single executemany.
+
+        Callers own the transaction and should chunk by ``settings.batch_size``.
+        With ``returning`` the new primary keys are returned in input order.
+        """
+        if not patterns:
+            return []
+        return await _insert_rows(session, cls, [{
+            'job_name': job_name,
+            'pattern': pattern_dict['pattern'],
+            'frequency': pattern_dict['frequency'],
+            'last_seen': pattern_dict['last_seen'],
+            'solution': pattern_dict.get('solution')
+        } for job_name, pattern_dict in patterns], returning)
+
 class Action(Base):
     """Agent action history table."""
     __tablename__ = "actions"
@@ -144,3 +262,20 @@ class Action(Base):
             result=action_dict['result'],
             timestamp=datetime.fromisoformat(action_dict['timestamp'])
         )
+
+    @classmethod
+    async def bulk_insert(cls, session: AsyncSession,
+                          actions: List[Tuple[int, Dict[str, Any], Optional[int]]]) -> None:
+        """Insert many ``(build_id, action_dict, pattern_id)`` triples with a single executemany.
+
+        Callers own the transaction and should chunk by ``settings.batch_size``.
+        """
+        if not actions:
+            return
+        await session.execute(insert(cls), [{
+            'build_id': build_id,
+            'type': action_dict['type'],
+            'pattern_id': pattern_id,
+            'result': action_dict['result'],
+            'timestamp': datetime.fromisoformat(action_dict['timestamp'])
+        } for build_id, action_dict, pattern_id in actions])
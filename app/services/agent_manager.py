@@ -1,21 +1,107 @@
 """Autonomous agent manager for build analysis and monitoring."""
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple
 import asyncio
+import heapq
+import itertools
+import re
+from dataclasses import dataclass
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from cachetools import LRUCache, TTLCache
 from loguru import logger
 from app.services.jenkins_client import JenkinsClient
 from app.services.bedrock_client import BedrockClient
 from app.services.build_analyzer import BuildAnalyzer
 from app.services.database import DatabaseService
 from app.models.build import BuildInfo, BuildAnalysis
-from app.utils.log_analyzer import (
-    analyze_test_failures,
-    analyze_build_time,
-    analyze_dependency_issues,
-    analyze_compilation_issues
-)
+from app.utils.log_analyzer import analyze_log, compile_literal_union
+from app.utils.clock import now_iso
+from app.utils.dicts import diff_dicts
+from app.utils.hashing import content_digest, stable_digest
+
+# Threads running log analysis off the event loop
+LOG_ANALYSIS_WORKERS = 4
+# Webhook-reported builds analyzed at the same time
+BUILD_EVENT_CONCURRENCY = 8
+
+# Log analysis results keyed by a digest of the console log, so retries and
+# repeated failures don't re-run the regex passes over the same text
+_log_analysis_cache: LRUCache = LRUCache(maxsize=256)
+
+# Cached analyses expire a week after they are stored
+ANALYSIS_CACHE_SIZE = 10_000
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600
+# Most recent cache keys remembered per job for pattern extraction
+RECENT_ANALYSES_PER_JOB = 200
+# Distinct build parameter sets shared between pattern entries
+INTERNED_PARAMS_SIZE = 4096
+# Failure contexts kept per pattern
+MAX_PATTERN_CONTEXTS = 10
+# Patterns not seen for this long are dropped by cleanup_patterns
+PATTERN_TTL = timedelta(days=30)
+# Patterns kept in memory per job; the least recently seen are dropped beyond this
+MAX_PATTERNS_PER_JOB = 5_000
+# Pattern changes are written back to the database in batches
+WRITEBACK_BATCH_SIZE = 256
+WRITEBACK_INTERVAL = 1.0
+# Name prefix of parameter-change correlation patterns, which persist without a type
+CORRELATION_PREFIX = 'param_change_'
+# Build results that may still change, so cached analyses holding them are redone
+NON_FINAL_RESULTS = frozenset({'IN_PROGRESS', 'UNKNOWN', None})
+# Job classes that hold other jobs rather than builds
+CONTAINER_JOB_CLASSES = frozenset({
+    'com.cloudbees.hudson.plugins.folder.Folder',
+    'org.jenkinsci.plugins.workflow.multibranch.WorkflowMultiBranchProject',
+    'jenkins.branch.OrganizationFolder'
+})
+
+@lru_cache(maxsize=512)
+def _stable_params_hash(items: Tuple[Tuple[str, Any], ...]) -> str:
+    """Hash sorted parameter items to a key that survives restarts."""
+    return stable_digest(dict(items)).hex()
+
+def _params_hash(params: Dict[str, Any]) -> str:
+    """Return the stable hash of a parameter dict, memoized for hashable values."""
+    items = tuple(sorted(params.items()))
+    try:
+        return _stable_params_hash(items)
+    except TypeError:
+        # Unhashable values (lists from multi-choice parameters) skip the memo
+        return stable_digest(params).hex()
+
+@dataclass
+class ContextEntry:
+    """A failed build in which a failure pattern was seen."""
+    # Declared by hand: dataclass(slots=True) needs Python 3.10
+    __slots__ = ('build_number', 'timestamp', 'parameters', 'duration')
+    build_number: int
+    timestamp: datetime
+    parameters: Dict[str, Any]
+    duration: int
+
+def _find_literals(matcher: "re.Pattern[str]", text: str) -> Dict[str, None]:
+    """Return the distinct matches of a literal-union regex, in order of appearance."""
+    return dict.fromkeys(match.group() for match in matcher.finditer(text))
 
 class AgentManager:
+    # Positive log indicators. Literals are matched against a single casefolded
+    # copy of the log; regexes are compiled once and searched case-insensitively.
+    _SUCCESS_LITERALS = [
+        (p, p.casefold()) for p in (
+            'BUILD SUCCESSFUL',
+            'All tests passed',
+            'Compilation successful',
+            'No errors found'
+        )
+    ]
+    _SUCCESS_REGEXES = [
+        (p, re.compile(p, re.IGNORECASE)) for p in (
+            'Tests run: .* Failures: 0',
+        )
+    ]
+
     def __init__(
         self,
         jenkins_client: JenkinsClient,
@@ -28,42 +114,250 @@ class AgentManager:
         self.analyzer = build_analyzer
         self.db = db_service
         
+        # Log analysis runs off the event loop
+        self._analysis_pool = ThreadPoolExecutor(
+            max_workers=LOG_ANALYSIS_WORKERS,
+            thread_name_prefix="log-analysis"
+        )
+        
         # Initialize monitoring and caching attributes
         self.active_monitors: Dict[str, asyncio.Task] = {}
-        self.analysis_cache: Dict[str, BuildAnalysis] = {}
-        self.pattern_database: Dict[str, List[Dict[str, Any]]] = {}
-        self.action_history: Dict[str, List[Dict[str, Any]]] = {}
+        # Builds pushed by the Jenkins webhook, consumed by consume_build_events
+        self._build_events: Optional[asyncio.Queue] = None
+        # Pattern changes waiting for the write-behind worker
+        self._writeback_q: Optional[asyncio.Queue] = None
+        # Jobs that push events stop being polled
+        self._pushed_jobs: Set[str] = set()
+        # Analyses currently running, so duplicate triggers share one run
+        self._inflight: Dict[Tuple[str, int], asyncio.Task] = {}
+        # Webhook event handlers still running; held so they aren't garbage collected
+        self._event_tasks: Set[asyncio.Task] = set()
+        # Last job listing, reused while Jenkins reports it unchanged
+        self._all_jobs: List[Dict[str, Any]] = []
+        # Newest build number the poller has seen per job
+        self._last_seen_build: Dict[str, int] = {}
+        self.analysis_cache: TTLCache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+        # job_name -> newest successful analysis, for failure correlation
+        self.latest_success: Dict[str, BuildAnalysis] = {}
+        # job_name -> recent analysis_cache keys, oldest first; may hold evicted keys
+        self._cache_by_job: Dict[str, deque] = defaultdict(
+            lambda: deque(maxlen=RECENT_ANALYSES_PER_JOB)
+        )
+        # job_name -> (type, pattern string) -> pattern
+        self.pattern_database: Dict[str, Dict[Tuple[Optional[str], str], Dict[str, Any]]] = {}
+        # job_name -> pattern string -> patterns of any type, kept in step with pattern_database
+        self.pattern_index: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        # job_name -> union regex of the job's failure patterns, built on demand
+        self._log_matchers: Dict[str, "re.Pattern[str]"] = {}
+        # job_name -> heap of (last_seen, seq, pattern), one entry per pattern; an
+        # entry's last_seen may lag the pattern's and is refreshed when popped
+        self._expiry_heap: Dict[str, List[Tuple[datetime, int, Dict[str, Any]]]] = defaultdict(list)
+        self._expiry_seq = itertools.count()
+        # Keyed by (job_name, build_number); formatted as "job#build" only at API edges
+        self.action_history: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        
+        # Identical build parameter sets are stored once and shared by patterns
+        self._params_intern: LRUCache = LRUCache(maxsize=INTERNED_PARAMS_SIZE)
+        
+        # Running totals so status endpoints don't walk the dicts per request
+        self._pattern_count = 0
+        self._action_count = 0
         
         # Initialize flags
         self.learning_enabled = True
         self.monitoring_enabled = True
         
-        # Initialize database
-        asyncio.create_task(self.db.init_db())
+    @classmethod
+    async def create(
+        cls,
+        jenkins_client: JenkinsClient,
+        bedrock_client: BedrockClient,
+        build_analyzer: BuildAnalyzer,
+        db_service: DatabaseService
+    ) -> "AgentManager":
+        """Create an agent manager with its database and patterns ready."""
+        manager = cls(jenkins_client, bedrock_client, build_analyzer, db_service)
+        await manager.initialize()
+        return manager
         
-        # Load patterns from database
-        asyncio.create_task(self.load_patterns())
+    async def initialize(self):
+        """Initialize the database, then load known patterns from it."""
+        await self.db.init_db()
+        await self.load_patterns()
         
     async def load_patterns(self):
         """Load patterns from the database."""
         try:
             logger.info("Loading patterns from database")
             patterns = await self.db.get_patterns()
-            self.pattern_database = patterns
-            logger.info(f"Loaded {sum(len(p) for p in patterns.values())} patterns from database")
+            self.pattern_database = {}
+            self.pattern_index = {}
+            self._log_matchers = {}
+            self._expiry_heap.clear()
+            self._pattern_count = 0
+            for job_name, job_patterns in patterns.items():
+                bucket = self.pattern_database[job_name] = {}
+                # Keep the most recently seen patterns, oldest first for eviction
+                job_patterns.sort(key=lambda pattern: pattern['last_seen'])
+                for pattern in job_patterns[-MAX_PATTERNS_PER_JOB:]:
+                    # Only failure-side patterns are persisted
+                    pattern.setdefault(
+                        'type',
+                        'correlation' if pattern['pattern'].startswith(CORRELATION_PREFIX) else 'failure'
+                    )
+                    if 'contexts' in pattern:
+                        pattern['contexts'] = deque(pattern['contexts'], maxlen=MAX_PATTERN_CONTEXTS)
+                    pattern['persisted_frequency'] = pattern['frequency']
+                    bucket[(pattern['type'], pattern['pattern'])] = pattern
+                    self._schedule_expiry(job_name, pattern)
+                self._pattern_count += len(bucket)
+                self._reindex_job(job_name)
+            logger.info(f"Loaded {self._pattern_count} patterns from database")
         except Exception as e:
             logger.error(f"Error loading patterns from database: {e}")
             # Initialize with empty pattern database
             self.pattern_database = {}
+            self.pattern_index = {}
+            self._log_matchers = {}
+            self._expiry_heap.clear()
+            self._pattern_count = 0
+        
+    @property
+    def pattern_total(self) -> int:
+        """Total number of patterns across all jobs."""
+        return self._pattern_count
+        
+    @property
+    def action_total(self) -> int:
+        """Total number of recorded actions across all builds."""
+        return self._action_count
+        
+    def _add_pattern(self, job_name: str, pattern: Dict[str, Any]):
+        """Add a pattern not yet known for a job."""
+        bucket = self.pattern_database.setdefault(job_name, {})
+        bucket[(pattern.get('type'), pattern['pattern'])] = pattern
+        self.pattern_index.setdefault(job_name, {}).setdefault(pattern['pattern'], []).append(pattern)
+        self._log_matchers.pop(job_name, None)
+        self._schedule_expiry(job_name, pattern)
+        self._queue_writeback(job_name, pattern)
+        self._pattern_count += 1
+        if len(bucket) > MAX_PATTERNS_PER_JOB:
+            self._evict_pattern(job_name, bucket)
+        
+    def _touch_pattern(self, job_name: str, pattern: Dict[str, Any]):
+        """Mark an existing pattern as seen now."""
+        pattern['last_seen'] = datetime.now()
+        # Keep each job's patterns in least recently seen order for eviction
+        bucket = self.pattern_database.get(job_name)
+        key = (pattern.get('type'), pattern['pattern'])
+        if bucket is not None and bucket.get(key) is pattern:
+            bucket[key] = bucket.pop(key)
+        self._queue_writeback(job_name, pattern)
+        
+    def _evict_pattern(self, job_name: str, bucket: Dict[Tuple[Optional[str], str], Dict[str, Any]]):
+        """Drop a job's least recently seen pattern from memory."""
+        pattern = bucket.pop(next(iter(bucket)))
+        same_text = self.pattern_index[job_name][pattern['pattern']]
+        same_text[:] = [other for other in same_text if other is not pattern]
+        if not same_text:
+            del self.pattern_index[job_name][pattern['pattern']]
+        self._log_matchers.pop(job_name, None)
+        self._pattern_count -= 1
+        # Evicted patterns leave their expiry entries behind; rebuild once they dominate
+        if len(self._expiry_heap[job_name]) > 2 * len(bucket):
+            self._rebuild_expiry(job_name)
+        
+    def invalidate(self, job_name: str):
+        """Drop everything held in memory for a job; persisted patterns are kept."""
+        for key in self._cache_by_job.pop(job_name, ()):
+            self.analysis_cache.pop(key, None)
+        self.latest_success.pop(job_name, None)
+        self._pattern_count -= len(self.pattern_database.pop(job_name, {}))
+        self.pattern_index.pop(job_name, None)
+        self._log_matchers.pop(job_name, None)
+        self._expiry_heap.pop(job_name, None)
+        self.jenkins.invalidate_job_info(job_name)
+        logger.info(f"Invalidated cached state for {job_name}")
+        
+    def _queue_writeback(self, job_name: str, pattern: Dict[str, Any]):
+        """Queue a new or updated pattern for the write-behind worker."""
+        # Success indicators are rebuilt from recent builds and are not persisted
+        if self._writeback_q is not None and pattern.get('type') != 'success':
+            self._writeback_q.put_nowait((job_name, pattern))
+            
+    async def _writeback_worker(self):
+        """Persist queued pattern changes in batches."""
+        while True:
+            batch = [await self._writeback_q.get()]
+            while len(batch) < WRITEBACK_BATCH_SIZE:
+                try:
+                    batch.append(self._writeback_q.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            # A pattern queued several times is written once, with the frequency
+            # gained since its last successful write
+            pending = {id(pattern): (job_name, pattern) for job_name, pattern in batch}
+            updates = [
+                (job_name, pattern, pattern['frequency'] - pattern.get('persisted_frequency', 0))
+                for job_name, pattern in pending.values()
+            ]
+            try:
+                await self.db.bulk_upsert_patterns(updates)
+                # Counts gained while the write was in flight stay pending
+                for _, pattern, delta in updates:
+                    pattern['persisted_frequency'] = pattern.get('persisted_frequency', 0) + delta
+                logger.debug(f"Persisted {len(updates)} pattern updates")
+            except Exception as e:
+                logger.error(f"Error persisting patterns: {e}")
+            await asyncio.sleep(WRITEBACK_INTERVAL)
+        
+    def _schedule_expiry(self, job_name: str, pattern: Dict[str, Any]):
+        """Track a pattern's last_seen so cleanup only visits expired entries."""
+        heapq.heappush(
+            self._expiry_heap[job_name],
+            (pattern['last_seen'], next(self._expiry_seq), pattern)
+        )
+        
+    def _rebuild_expiry(self, job_name: str):
+        """Rebuild a job's expiry heap from the patterns it still holds."""
+        heap = [
+            (pattern['last_seen'], next(self._expiry_seq), pattern)
+            for pattern in self.pattern_database.get(job_name, {}).values()
+        ]
+        heapq.heapify(heap)
+        self._expiry_heap[job_name] = heap
+        
+    def _intern_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a shared copy of a build parameter dict; treat it as read-only."""
+        key = stable_digest(params)
+        interned = self._params_intern.get(key)
+        if interned is None:
+            interned = self._params_intern[key] = dict(params)
+        return interned
+        
+    def _reindex_job(self, job_name: str):
+        """Rebuild the pattern index for a job from its patterns."""
+        index: Dict[str, List[Dict[str, Any]]] = {}
+        for pattern in self.pattern_database.get(job_name, {}).values():
+            index.setdefault(pattern['pattern'], []).append(pattern)
+        self.pattern_index[job_name] = index
+        self._log_matchers.pop(job_name, None)
+        
+    async def _jenkins_call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking Jenkins client call on the client's bounded thread pool."""
+        return await self.jenkins.call(func, *args)
         
     async def start(self):
         """Start the agent manager and its monitoring tasks."""
         logger.info("Starting agent monitoring tasks")
+        self._build_events = asyncio.Queue()
+        self._writeback_q = asyncio.Queue()
         try:
             await asyncio.gather(
+                self._writeback_worker(),
+                self.consume_build_events(),
                 self.monitor_builds(),
-                self.update_pattern_database(),
-                self.cleanup_cache()
+                self.update_pattern_database()
             )
         except Exception as e:
             logger.error(f"Failed to start monitoring tasks: {e}")
@@ -75,9 +369,11 @@ class AgentManager:
         while True:
             try:
                 logger.debug("Fetching Jenkins jobs")
-                jobs = self._get_all_jobs()
+                jobs = await self._get_all_jobs()
                 for job in jobs:
                     job_name = job['fullname'] if 'fullname' in job else job['name']
+                    if job_name in self._pushed_jobs:
+                        continue
                     if job_name not in self.active_monitors:
                         logger.info(f"Starting monitor for job: {job_name}")
                         self.active_monitors[job_name] = asyncio.create_task(
@@ -96,26 +392,74 @@ class AgentManager:
                 await asyncio.sleep(300)  # Back off on error
                 
     async def monitor_job(self, job_name: str):
-        """Monitor a specific Jenkins job."""
-        last_build = None
+        """Poll a specific Jenkins job until it starts pushing build events."""
         logger.info(f"Started monitoring job: {job_name}")
-        while True:
+        while job_name not in self._pushed_jobs:
             try:
                 logger.debug(f"Checking for new builds in {job_name}")
-                job_info = self.jenkins.server.get_job_info(job_name)
-                latest_build = job_info.get('lastBuild', {}).get('number')
+                latest_build = await self._jenkins_call(self.jenkins.get_last_build_number, job_name)
                 
-                if latest_build and latest_build != last_build:
+                if latest_build and latest_build != self._last_seen_build.get(job_name):
+                    self._last_seen_build[job_name] = latest_build
                     await self.analyze_and_act(job_name, latest_build)
-                    last_build = latest_build
                     
                 await asyncio.sleep(30)  # Check every 30 seconds
             except Exception as e:
                 logger.error(f"Error monitoring job {job_name}: {e}")
                 await asyncio.sleep(300)
+        logger.info(f"Stopped polling job {job_name}; builds arrive via webhook")
+        
+    def notify_build(self, job_name: str, build_number: int) -> bool:
+        """Queue a completed build reported by the Jenkins webhook."""
+        if self._build_events is None:
+            return False
+        self._pushed_jobs.add(job_name)
+        self._build_events.put_nowait((job_name, build_number))
+        return True
+        
+    async def consume_build_events(self):
+        """Analyze builds as the webhook reports them."""
+        logger.info("Starting build event consumer")
+        # Builds are analyzed concurrently, up to BUILD_EVENT_CONCURRENCY at a time
+        slots = asyncio.Semaphore(BUILD_EVENT_CONCURRENCY)
+        while True:
+            # Builds can finish out of order and Jenkins may report one more than once
+            # (COMPLETED, FINALIZED); analyze_and_act skips builds already analyzed
+            job_name, build_number = await self._build_events.get()
+            await slots.acquire()
+            task = asyncio.create_task(self._handle_build_event(job_name, build_number, slots))
+            self._event_tasks.add(task)
+            task.add_done_callback(self._event_tasks.discard)
+            
+    async def _handle_build_event(self, job_name: str, build_number: int, slots: asyncio.Semaphore):
+        """Analyze one webhook-reported build, then free its slot."""
+        try:
+            await self.analyze_and_act(job_name, build_number)
+        except Exception as e:
+            logger.error(f"Error handling build event {job_name}#{build_number}: {e}")
+        finally:
+            slots.release()
+            self._build_events.task_done()
                 
     async def analyze_and_act(self, job_name: str, build_number: int):
-        """Analyze a build and take appropriate actions."""
+        """Analyze a build and take appropriate actions, once per build."""
+        cached = self.analysis_cache.get(f"{job_name}#{build_number}")
+        if cached is not None and cached.build_info.result not in NON_FINAL_RESULTS:
+            logger.debug(f"Build {job_name}#{build_number} already analyzed")
+            return
+        key = (job_name, build_number)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze_and_act(job_name, build_number))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.debug(f"Joining in-flight analysis for {job_name}#{build_number}")
+        # A cancelled caller must not cancel the analysis other callers are waiting on
+        await asyncio.shield(task)
+        
+    async def _analyze_and_act(self, job_name: str, build_number: int):
+        """Run the analysis and follow-up actions for a build."""
         try:
             logger.info(f"Starting analysis for build {job_name}#{build_number}")
             # Get build analysis
@@ -124,7 +468,14 @@ class AgentManager:
             # Cache the analysis
             cache_key = f"{job_name}#{build_number}"
             self.analysis_cache[cache_key] = analysis
+            recent_keys = self._cache_by_job[job_name]
+            if cache_key not in recent_keys:
+                recent_keys.append(cache_key)
             logger.debug(f"Cached analysis for {cache_key}")
+            if analysis.build_info.result == 'SUCCESS':
+                latest = self.latest_success.get(job_name)
+                if latest is None or latest.build_info.build_number < build_number:
+                    self.latest_success[job_name] = analysis
             
             # If build failed, take action
             if analysis.build_info.result != 'SUCCESS':
@@ -140,10 +491,16 @@ class AgentManager:
     async def handle_failure(self, analysis: BuildAnalysis):
         """Handle build failures intelligently."""
         actions_taken = []
-        build_key = f"{analysis.build_info.job_name}#{analysis.build_info.build_number}"
+        build_info = analysis.build_info
+        job_name = build_info.job_name
+        build_number = build_info.build_number
+        build_key = (job_name, build_number)
         
         # Check for known patterns
         matches = self.match_known_patterns(analysis)
+        if not matches and build_info.console_log:
+            # The LLM may not have reported the error verbatim; look in the log itself
+            matches = await self.match_patterns_in_log(job_name, build_info.console_log)
         if matches:
             for match in matches:
                 action = await self.apply_known_solution(match, analysis)
@@ -155,10 +512,9 @@ class AgentManager:
                 })
         
         # Analyze specific issues
-        test_results = analyze_test_failures(analysis.build_info.console_log)
-        timing_info = analyze_build_time(analysis.build_info.console_log)
-        dependency_issues = analyze_dependency_issues(analysis.build_info.console_log)
-        compilation_issues = analyze_compilation_issues(analysis.build_info.console_log)
+        test_results, timing_info, dependency_issues, compilation_issues = await self._analyze_log(
+            build_info.console_log
+        )
         
         # Take specific actions based on issue type
         if test_results['failed_tests']:
@@ -199,19 +555,31 @@ class AgentManager:
         
         # Update build description using the proper method
         try:
-            self.jenkins.update_build_description(
-                analysis.build_info.job_name,
-                analysis.build_info.build_number,
+            await self._jenkins_call(
+                self.jenkins.update_build_description,
+                job_name,
+                build_number,
                 description
             )
-            logger.debug(f"Updated build description for {analysis.build_info.job_name}#{analysis.build_info.build_number}")
+            logger.debug(f"Updated build description for {job_name}#{build_number}")
         except Exception as e:
             logger.error(f"Failed to update build description: {e}")
         
+    async def _analyze_log(self, console_log: str) -> Tuple[Any, ...]:
+        """Run the log analyzers in the pool, memoized by content digest."""
+        key = content_digest(console_log)
+        results = _log_analysis_cache.get(key)
+        if results is None:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._analysis_pool, analyze_log, console_log)
+            _log_analysis_cache[key] = results
+        return results
+        
     async def learn_from_build(self, analysis: BuildAnalysis):
         """Learn from build outcomes to improve future analysis."""
-        build_key = f"{analysis.build_info.job_name}#{analysis.build_info.build_number}"
-        if analysis.build_info.result == 'SUCCESS':
+        build_info = analysis.build_info
+        build_key = f"{build_info.job_name}#{build_info.build_number}"
+        if build_info.result == 'SUCCESS':
             # Learn from successful builds
             logger.info(f"Learning from successful build: {build_key}")
             self.update_success_patterns(analysis)
@@ -222,22 +590,51 @@ class AgentManager:
             
     def match_known_patterns(self, analysis: BuildAnalysis) -> List[Dict[str, Any]]:
         """Match build issues against known patterns."""
-        matches = []
-        for pattern in self.pattern_database.get(analysis.build_info.job_name, []):
-            if self.pattern_matches(pattern, analysis):
-                matches.append(pattern)
-        return matches
+        index = self.pattern_index.get(analysis.build_info.job_name)
+        if not index:
+            return []
+        # Walk each distinct error string once so a pattern is matched at most once
+        error_keys = dict.fromkeys(error['pattern'] for error in analysis.error_patterns)
+        return [
+            pattern
+            for key in error_keys
+            for pattern in index.get(key, ())
+        ]
     
-    def _record_action(self, build_key: str, action: Dict[str, Any]):
+    async def match_patterns_in_log(self, job_name: str, console_log: str) -> List[Dict[str, Any]]:
+        """Match a job's known failure patterns against the raw log in one pass."""
+        index = self.pattern_index.get(job_name)
+        if not index:
+            return []
+        matcher = self._log_matchers.get(job_name)
+        if matcher is None:
+            matcher = self._log_matchers[job_name] = compile_literal_union(
+                key for key, patterns in index.items()
+                if any(pattern.get('type') != 'success' for pattern in patterns)
+            )
+        # Only the scan leaves the event loop; the index is read here, not in the pool
+        loop = asyncio.get_running_loop()
+        found = await loop.run_in_executor(self._analysis_pool, _find_literals, matcher, console_log)
+        index = self.pattern_index.get(job_name, {})
+        return [
+            pattern
+            for key in found
+            for pattern in index.get(key, ())
+            if pattern.get('type') != 'success'
+        ]
+    
+    def _record_action(self, build_key: Tuple[str, int], action: Dict[str, Any]):
         """Record an action taken by the agent."""
         if build_key not in self.action_history:
             self.action_history[build_key] = []
-        action["timestamp"] = datetime.now().isoformat()
+        # Action timestamps only need one-second resolution
+        action["timestamp"] = now_iso()
         self.action_history[build_key].append(action)
+        self._action_count += 1
 
     async def apply_known_solution(self, pattern: Dict[str, Any], analysis: BuildAnalysis) -> str:
         """Apply a known solution and record the action."""
-        build_key = f"{analysis.build_info.job_name}#{analysis.build_info.build_number}"
+        build_key = (analysis.build_info.job_name, analysis.build_info.build_number)
         solution = pattern.get('solution')
         if not solution:
             return "No known solution"
@@ -266,7 +663,8 @@ class AgentManager:
     async def retry_build(self, analysis: BuildAnalysis) -> str:
         """Retry a failed build with potential adjustments."""
         try:
-            self.jenkins.server.build_job(
+            await self._jenkins_call(
+                self.jenkins.server.build_job,
                 analysis.build_info.job_name,
                 analysis.build_info.parameters
             )
@@ -280,7 +678,8 @@ class AgentManager:
         try:
             new_params = analysis.build_info.parameters.copy()
             new_params.update(adjustments)
-            self.jenkins.server.build_job(
+            await self._jenkins_call(
+                self.jenkins.server.build_job,
                 analysis.build_info.job_name,
                 new_params
             )
@@ -301,15 +700,19 @@ class AgentManager:
         while True:
             try:
                 # Analyze recent builds to identify patterns
-                for job_name in self.pattern_database.keys():
-                    recent_analyses = [
-                        analysis for key, analysis in self.analysis_cache.items()
-                        if key.startswith(f"{job_name}#")
-                    ]
+                for job_name, bucket in list(self.pattern_database.items()):
+                    recent_analyses = self._recent_analyses(job_name)
                     
                     if recent_analyses:
-                        new_patterns = self.extract_patterns(recent_analyses)
-                        self.pattern_database[job_name].extend(new_patterns)
+                        for new_pattern in self.extract_patterns(recent_analyses):
+                            existing_pattern = bucket.get(('failure', new_pattern['pattern']))
+                            if existing_pattern:
+                                existing_pattern['frequency'] = max(
+                                    existing_pattern['frequency'], new_pattern['frequency']
+                                )
+                                self._touch_pattern(job_name, existing_pattern)
+                            else:
+                                self._add_pattern(job_name, new_pattern)
                         
                 # Clean up old patterns
                 self.cleanup_patterns()
@@ -319,29 +722,38 @@ class AgentManager:
                 logger.error(f"Error updating pattern database: {e}")
                 await asyncio.sleep(3600)
                 
+    def _recent_analyses(self, job_name: str) -> List[BuildAnalysis]:
+        """Return the job's cached analyses that have not expired."""
+        keys = self._cache_by_job.get(job_name, ())
+        return [
+            analysis for analysis in map(self.analysis_cache.get, keys)
+            if analysis is not None
+        ]
+        
     def extract_patterns(self, analyses: List[BuildAnalysis]) -> List[Dict[str, Any]]:
         """Extract common patterns from build analyses."""
-        patterns = []
         # Implementation would use clustering or pattern matching algorithms
         # This is a simplified version
-        error_counts: Dict[str, int] = {}
+        error_counts = Counter(
+            error['pattern']
+            for analysis in analyses
+            for error in analysis.error_patterns
+        )
         
-        for analysis in analyses:
-            for error in analysis.error_patterns:
-                key = error['pattern']
-                error_counts[key] = error_counts.get(key, 0) + 1
-                
         # Convert frequent patterns to pattern database entries
-        for pattern, count in error_counts.items():
-            if count >= 3:  # Pattern appears in at least 3 builds
-                patterns.append({
-                    'pattern': pattern,
-                    'frequency': count,
-                    'last_seen': datetime.now(),
-                    'solution': self.derive_solution(pattern, analyses)
-                })
-                
-        return patterns
+        now = datetime.now()
+        return [
+            {
+                # Same entry update_failure_patterns keeps for this error text
+                'type': 'failure',
+                'pattern': pattern,
+                'frequency': count,
+                'last_seen': now,
+                'solution': self.derive_solution(pattern, analyses)
+            }
+            for pattern, count in error_counts.items()
+            if count >= 3  # Pattern appears in at least 3 builds
+        ]
     
     def derive_solution(self, pattern: str, analyses: List[BuildAnalysis]) -> Optional[Dict[str, Any]]:
         """Derive a solution for a pattern based on historical data."""
@@ -351,40 +763,26 @@ class AgentManager:
         
     def cleanup_patterns(self):
         """Clean up old or invalid patterns."""
-        now = datetime.now()
-        for job_name in self.pattern_database.keys():
-            self.pattern_database[job_name] = [
-                pattern for pattern in self.pattern_database[job_name]
-                if now - pattern['last_seen'] < timedelta(days=30)
-            ]
+        cutoff = datetime.now() - PATTERN_TTL
+        for job_name, heap in self._expiry_heap.items():
+            bucket = self.pattern_database.get(job_name, {})
+            expired = False
+            while heap and heap[0][0] <= cutoff:
+                _, _, pattern = heapq.heappop(heap)
+                key = (pattern.get('type'), pattern['pattern'])
+                # Entries of evicted or replaced patterns are dropped
+                if bucket.get(key) is not pattern:
+                    continue
+                if pattern['last_seen'] <= cutoff:
+                    del bucket[key]
+                    self._pattern_count -= 1
+                    expired = True
+                else:
+                    # Seen since the entry was pushed; requeue at its current last_seen
+                    self._schedule_expiry(job_name, pattern)
+            if expired:
+                self._reindex_job(job_name)
             
-    async def cleanup_cache(self):
-        """Periodically clean up the analysis cache."""
-        while True:
-            try:
-                now = datetime.now()
-                expired = []
-                
-                for key, analysis in self.analysis_cache.items():
-                    if now - analysis.timestamp > timedelta(days=7):
-                        expired.append(key)
-                        
-                for key in expired:
-                    del self.analysis_cache[key]
-                    
-                await asyncio.sleep(3600)  # Clean up every hour
-            except Exception as e:
-                logger.error(f"Error cleaning up cache: {e}")
-                await asyncio.sleep(3600)
-                
-    def pattern_matches(self, pattern: Dict[str, Any], analysis: BuildAnalysis) -> bool:
-        """Check if a pattern matches the current build analysis."""
-        pattern_str = pattern['pattern']
-        return any(
-            error['pattern'] == pattern_str
-            for error in analysis.error_patterns
-        )
-    
     async def handle_test_failures(self, analysis: BuildAnalysis, test_results: Dict[str, Any]) -> str:
         """Handle test failures by analyzing patterns and suggesting fixes."""
         failed_tests = test_results.get('failed_tests', [])
@@ -464,43 +862,36 @@ class AgentManager:
         
     def update_success_patterns(self, analysis: BuildAnalysis):
         """Update patterns based on successful builds."""
-        job_name = analysis.build_info.job_name
+        build_info = analysis.build_info
+        job_name = build_info.job_name
         
-        # Initialize job patterns if not exists
-        if job_name not in self.pattern_database:
-            self.pattern_database[job_name] = []
-            
         # Extract success patterns from the build
         success_indicators = self._extract_success_indicators(analysis)
         
+        lookup = self.pattern_database.setdefault(job_name, {})
+        duration = build_info.duration
         for indicator in success_indicators:
             # Check if this success pattern already exists
-            existing_pattern = None
-            for pattern in self.pattern_database[job_name]:
-                if (pattern.get('type') == 'success' and 
-                    pattern.get('indicator') == indicator['pattern']):
-                    existing_pattern = pattern
-                    break
-                    
+            existing_pattern = lookup.get(('success', indicator['pattern']))
             if existing_pattern:
                 # Update existing pattern
                 existing_pattern['frequency'] += 1
-                existing_pattern['last_seen'] = datetime.now()
+                self._touch_pattern(job_name, existing_pattern)
                 existing_pattern['success_rate'] = min(1.0, existing_pattern.get('success_rate', 0.8) + 0.1)
             else:
                 # Create new success pattern
-                self.pattern_database[job_name].append({
+                self._add_pattern(job_name, {
                     'type': 'success',
                     'pattern': indicator['pattern'],
                     'indicator': indicator['pattern'],
                     'frequency': 1,
                     'last_seen': datetime.now(),
                     'success_rate': 0.9,
-                    'build_params': analysis.build_info.parameters.copy(),
+                    'build_params': self._intern_params(build_info.parameters),
                     'environment': indicator.get('environment', {}),
                     'duration_range': {
-                        'min': analysis.build_info.duration,
-                        'max': analysis.build_info.duration
+                        'min': duration,
+                        'max': duration
                     }
                 })
                 
@@ -508,45 +899,36 @@ class AgentManager:
         
     def update_failure_patterns(self, analysis: BuildAnalysis):
         """Update patterns based on failed builds."""
-        job_name = analysis.build_info.job_name
+        build_info = analysis.build_info
+        job_name = build_info.job_name
+        
+        # Every pattern touched by this build gets the same context fields
+        build_number = build_info.build_number
+        parameters = self._intern_params(build_info.parameters)
+        duration = build_info.duration
+        lookup = self.pattern_database.setdefault(job_name, {})
         
-        # Initialize job patterns if not exists
-        if job_name not in self.pattern_database:
-            self.pattern_database[job_name] = []
-            
         # Extract failure patterns from the analysis
         for error_pattern in analysis.error_patterns:
             pattern_key = error_pattern.get('pattern', '')
             
             # Check if this failure pattern already exists
-            existing_pattern = None
-            for pattern in self.pattern_database[job_name]:
-                if (pattern.get('type') == 'failure' and 
-                    pattern.get('pattern') == pattern_key):
-                    existing_pattern = pattern
-                    break
-                    
+            existing_pattern = lookup.get(('failure', pattern_key))
             if existing_pattern:
                 # Update existing pattern
                 existing_pattern['frequency'] += 1
-                existing_pattern['last_seen'] = datetime.now()
+                self._touch_pattern(job_name, existing_pattern)
                 existing_pattern['severity'] = max(
                     existing_pattern.get('severity', 'medium'),
                     analysis.severity
                 )
                 
-                # Update failure contexts
+                # Update failure contexts; the deque drops the oldest beyond the limit
                 if 'contexts' not in existing_pattern:
-                    existing_pattern['contexts'] = []
-                existing_pattern['contexts'].append({
-                    'build_number': analysis.build_info.build_number,
-                    'timestamp': analysis.timestamp,
-                    'parameters': analysis.build_info.parameters.copy(),
-                    'duration': analysis.build_info.duration
-                })
-                
-                # Keep only last 10 contexts to prevent memory bloat
-                existing_pattern['contexts'] = existing_pattern['contexts'][-10:]
+                    existing_pattern['contexts'] = deque(maxlen=MAX_PATTERN_CONTEXTS)
+                existing_pattern['contexts'].append(
+                    ContextEntry(build_number, analysis.timestamp, parameters, duration)
+                )
                 
             else:
                 # Create new failure pattern
@@ -558,12 +940,10 @@ class AgentManager:
                     'severity': analysis.severity,
                     'confidence': analysis.confidence,
                     'error_type': error_pattern.get('type', 'unknown'),
-                    'contexts': [{
-                        'build_number': analysis.build_info.build_number,
-                        'timestamp': analysis.timestamp,
-                        'parameters': analysis.build_info.parameters.copy(),
-                        'duration': analysis.build_info.duration
-                    }],
+                    'contexts': deque(
+                        [ContextEntry(build_number, analysis.timestamp, parameters, duration)],
+                        maxlen=MAX_PATTERN_CONTEXTS
+                    ),
                     'solution': None  # Will be derived later
                 }
                 
@@ -572,7 +952,7 @@ class AgentManager:
                 if initial_solution:
                     new_pattern['solution'] = initial_solution
                     
-                self.pattern_database[job_name].append(new_pattern)
+                self._add_pattern(job_name, new_pattern)
                 
         # Check if we can correlate this failure with previous successful builds
         self._correlate_failure_with_success(analysis)
@@ -582,33 +962,37 @@ class AgentManager:
     def _extract_success_indicators(self, analysis: BuildAnalysis) -> List[Dict[str, Any]]:
         """Extract indicators that contributed to build success."""
         indicators = []
+        build_info = analysis.build_info
+        parameters = build_info.parameters
+        duration = build_info.duration
         
         # Check build parameters that often correlate with success
         stable_params = ['branch', 'environment', 'version']
         param_indicators = {}
         for param in stable_params:
-            if param in analysis.build_info.parameters:
-                param_indicators[param] = analysis.build_info.parameters[param]
+            if param in parameters:
+                param_indicators[param] = parameters[param]
                 
         if param_indicators:
             indicators.append({
-                'pattern': f"stable_params_{hash(str(sorted(param_indicators.items())))}",
+                'pattern': f"stable_params_{_params_hash(param_indicators)}",
                 'type': 'parameters',
                 'environment': param_indicators
             })
             
         # Check build timing - successful builds often have consistent timing
-        if analysis.build_info.duration:
-            duration_category = 'fast' if analysis.build_info.duration < 300 else 'normal'
+        if duration:
+            duration_category = 'fast' if duration < 300 else 'normal'
             indicators.append({
                 'pattern': f"timing_{duration_category}",
                 'type': 'timing',
-                'duration': analysis.build_info.duration
+                'duration': duration
             })
             
         # Check for absence of common failure indicators in logs
-        if hasattr(analysis.build_info, 'console_log') and analysis.build_info.console_log:
-            log_indicators = self._extract_log_success_indicators(analysis.build_info.console_log)
+        console_log = getattr(build_info, 'console_log', None)
+        if console_log:
+            log_indicators = self._extract_log_success_indicators(console_log)
             indicators.extend(log_indicators)
             
         return indicators
@@ -616,24 +1000,18 @@ class AgentManager:
     def _extract_log_success_indicators(self, console_log: str) -> List[Dict[str, Any]]:
         """Extract success indicators from build logs."""
         indicators = []
+        log_folded = console_log.casefold()
         
         # Look for positive indicators
-        success_patterns = [
-            'BUILD SUCCESSFUL',
-            'Tests run: .* Failures: 0',
-            'All tests passed',
-            'Compilation successful',
-            'No errors found'
-        ]
-        
-        for pattern in success_patterns:
-            if pattern.lower() in console_log.lower():
-                indicators.append({
-                    'pattern': f"log_success_{pattern.replace(' ', '_').lower()}",
-                    'type': 'log_indicator',
-                    'matched_text': pattern
-                })
-                
+        matched = [p for p, folded in self._SUCCESS_LITERALS if folded in log_folded]
+        matched += [p for p, regex in self._SUCCESS_REGEXES if regex.search(console_log)]
+        for pattern in matched:
+            indicators.append({
+                'pattern': f"log_success_{pattern.replace(' ', '_').lower()}",
+                'type': 'log_indicator',
+                'matched_text': pattern
+            })
+            
         return indicators
         
     def _derive_initial_solution(self, error_pattern: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -679,21 +1057,16 @@ class AgentManager:
         """Correlate current failure with previous successful builds to identify differences."""
         job_name = analysis.build_info.job_name
         
-        # Find recent successful builds from cache
-        successful_analyses = []
-        for key, cached_analysis in self.analysis_cache.items():
-            if (key.startswith(f"{job_name}#") and 
-                cached_analysis.build_info.result == 'SUCCESS' and
-                cached_analysis.build_info.build_number < analysis.build_info.build_number):
-                successful_analyses.append(cached_analysis)
-                
-        if not successful_analyses:
+        # Compare against the job's most recent successful build, if it is older
+        # than this failure and still within the analysis cache window
+        latest_success = self.latest_success.get(job_name)
+        if latest_success is None:
+            return
+        success_number = latest_success.build_info.build_number
+        if (success_number >= analysis.build_info.build_number or
+                f"{job_name}#{success_number}" not in self.analysis_cache):
             return
             
-        # Get the most recent successful build
-        latest_success = max(successful_analyses, 
-                           key=lambda x: x.build_info.build_number)
-        
         # Compare parameters
         param_diff = self._compare_build_parameters(
             analysis.build_info.parameters,
@@ -701,78 +1074,81 @@ class AgentManager:
         )
         
         if param_diff:
-            # Add correlation pattern
-            correlation_pattern = {
-                'type': 'correlation',
-                'pattern': f"param_change_{hash(str(sorted(param_diff.items())))}",
-                'frequency': 1,
-                'last_seen': datetime.now(),
-                'parameter_changes': param_diff,
-                'success_build': latest_success.build_info.build_number,
-                'failure_build': analysis.build_info.build_number,
-                'solution': {
-                    'type': 'parameter_adjust',
-                    'parameters': {k: v['old'] for k, v in param_diff.items() 
-                                 if v['type'] == 'changed'},
-                    'reason': 'Revert parameter changes that may have caused failure'
+            # Key on a digest that is stable across restarts so repeats dedupe
+            pattern_key = f"{CORRELATION_PREFIX}{stable_digest(param_diff).hex()}"
+            existing_pattern = self.pattern_database.setdefault(job_name, {}).get(('correlation', pattern_key))
+            if existing_pattern:
+                existing_pattern['frequency'] += 1
+                existing_pattern['success_build'] = success_number
+                existing_pattern['failure_build'] = analysis.build_info.build_number
+                self._touch_pattern(job_name, existing_pattern)
+            else:
+                # Add correlation pattern
+                correlation_pattern = {
+                    'type': 'correlation',
+                    'pattern': pattern_key,
+                    'frequency': 1,
+                    'last_seen': datetime.now(),
+                    'parameter_changes': param_diff,
+                    'success_build': success_number,
+                    'failure_build': analysis.build_info.build_number,
+                    'solution': {
+                        'type': 'parameter_adjust',
+                        'parameters': {k: v['old'] for k, v in param_diff.items() 
+                                     if v['type'] == 'changed'},
+                        'reason': 'Revert parameter changes that may have caused failure'
+                    }
                 }
-            }
-            
-            if job_name not in self.pattern_database:
-                self.pattern_database[job_name] = []
-            self.pattern_database[job_name].append(correlation_pattern)
+                
+                self._add_pattern(job_name, correlation_pattern)
             
             logger.info(f"Found parameter correlation for {job_name}: {param_diff}")
             
     def _compare_build_parameters(self, current_params: Dict[str, Any], 
                                 success_params: Dict[str, Any]) -> Dict[str, Any]:
         """Compare build parameters between current and successful builds."""
-        diff = {}
-        all_keys = set(current_params.keys()) | set(success_params.keys())
-        
-        for key in all_keys:
-            if key not in current_params:
-                diff[key] = {'type': 'removed', 'old': success_params[key], 'new': None}
-            elif key not in success_params:
-                diff[key] = {'type': 'added', 'old': None, 'new': current_params[key]}
-            elif current_params[key] != success_params[key]:
-                diff[key] = {'type': 'changed', 'old': success_params[key], 'new': current_params[key]}
-                
-        return diff
+        return diff_dicts(current_params, success_params)
 
-    def _get_all_jobs(self) -> List[Dict[str, Any]]:
-        """Get all Jenkins jobs including multibranch pipeline jobs."""
+    async def _get_all_jobs(self) -> List[Dict[str, Any]]:
+        """Get all Jenkins jobs including folder and multibranch pipeline jobs."""
+        try:
+            tree = await self._jenkins_call(self.jenkins.get_jobs_tree)
+        except Exception as e:
+            logger.error(f"Failed to get Jenkins jobs: {e}")
+            return []
+        if tree is None:
+            logger.debug("Jenkins job list unchanged")
+            return self._all_jobs
+            
         all_jobs = []
+        truncated = []
         
         def collect_jobs(jobs, prefix=""):
             for job in jobs:
-                if job.get('_class') == 'org.jenkinsci.plugins.workflow.multibranch.WorkflowMultiBranchProject':
-                    # This is a multibranch pipeline, get its sub-jobs
-                    try:
-                        multibranch_jobs = self.jenkins.server.get_jobs(folder_depth=1, )
-                        for sub_job in multibranch_jobs:
-                            sub_job['fullname'] = f"{prefix}{job['name']}/{sub_job['name']}"
-                            all_jobs.append(sub_job)
-                    except Exception as e:
-                        logger.warning(f"Failed to get multibranch jobs for {job['name']}: {e}")
-                elif job.get('_class') == 'com.cloudbees.hudson.plugins.folder.Folder':
-                    # This is a folder, get its sub-jobs
-                    try:
-                        folder_jobs = self.jenkins.server.get_jobs(folder_depth=1, )
-                        collect_jobs(folder_jobs, f"{prefix}{job['name']}/")
-                    except Exception as e:
-                        logger.warning(f"Failed to get folder jobs for {job['name']}: {e}")
+                if job.get('_class') in CONTAINER_JOB_CLASSES:
+                    # Folders and multibranch pipelines come back with their children
+                    if 'jobs' not in job:
+                        truncated.append(f"{prefix}{job['name']}")
+                        continue
+                    collect_jobs(job['jobs'], f"{prefix}{job['name']}/")
                 else:
                     # Regular job
                     job['fullname'] = f"{prefix}{job['name']}"
                     all_jobs.append(job)
-        
-        try:
-            top_level_jobs = self.jenkins.server.get_jobs()
-            collect_jobs(top_level_jobs)
-        except Exception as e:
-            logger.error(f"Failed to get Jenkins jobs: {e}")
-            return []
-            
+                    
+        collect_jobs(tree)
+        # Containers nested deeper than the tree are expanded level by level, concurrently
+        while truncated:
+            folders, truncated = truncated, []
+            subtrees = await asyncio.gather(
+                *(self._jenkins_call(self.jenkins.get_folder_jobs_tree, folder) for folder in folders),
+                return_exceptions=True
+            )
+            for folder, subtree in zip(folders, subtrees):
+                if isinstance(subtree, Exception):
+                    logger.error(f"Failed to get jobs in folder {folder}: {subtree}")
+                    continue
+                collect_jobs(subtree, f"{folder}/")
+        self._all_jobs = all_jobs
         logger.debug(f"Found {len(all_jobs)} total jobs (including multibranch pipelines)")
         return all_jobs
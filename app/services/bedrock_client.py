@@ -1,12 +1,106 @@
 """Amazon Bedrock integration service for LLM-based build analysis."""
+import asyncio
+import hashlib
 import json
+import os
+import re
+import tempfile
 from typing import Dict, Any, List, Optional
 import boto3
 from loguru import logger
 from app.core.config import Settings
 from app.models.build import BuildInfo, BuildAnalysis
+from app.utils.log_analyzer import focus_log
 from datetime import datetime
 
+# Bump when the prompt template or response schema changes to invalidate cached analyses
+CACHE_VERSION = 2
+
+# Cached analyses kept on disk; the least recently used are pruned every
+# BEDROCK_CACHE_PRUNE_EVERY writes
+BEDROCK_CACHE_MAX_ENTRIES = 10_000
+BEDROCK_CACHE_PRUNE_EVERY = 100
+
+# Longest console log sent to the model; longer logs are cut down to their error regions
+PROMPT_LOG_CHARS = 32_768
+
+# Static parts of the analysis prompt; only the build details and logs vary
+_PROMPT_HEAD = (
+    "\n\nHuman: You are a Jenkins build analysis expert. Please analyze the following build failure "
+    "and provide structured insights.\n\nJenkins Build Details:\nBuild: %s #%s\nResult: %s\n\n"
+    "Build Console Log:\n"
+)
+_PROMPT_LAST_SUCCESS = "Last Successful Build #%s Console Log for Comparison:\n"
+_PROMPT_TAIL = """Please analyze this build and:
+1. Identify the main error patterns and their context
+2. Note key differences from the successful build
+3. Determine likely root causes
+4. Provide specific recommendations for fixing the issue
+5. Assign a severity level and confidence score
+
+Provide your analysis as a JSON object with these fields:
+{
+    "error_patterns": [{"pattern": "error pattern", "context": "surrounding context"}],
+    "differences": [{"type": "change type", "description": "what changed"}],
+    "recommendations": ["specific action 1", "specific action 2"],
+    "severity": "HIGH|MEDIUM|LOW",
+    "confidence": 0.0-1.0
+}
+
+\n\nAssistant: I'll analyze the build and provide my findings in the requested JSON format.
+"""
+
+# Characters that change nesting or string state while scanning JSON
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+class _JsonObjectScanner:
+    """Find the first complete top-level JSON object in text received in chunks."""
+    __slots__ = ('_parts', '_length', '_start', '_depth', '_in_string', '_escaped')
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def text(self) -> str:
+        """Return everything received so far."""
+        return ''.join(self._parts)
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Consume a chunk, returning the object's text once its closing brace arrives."""
+        offset = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        skip = 1 if self._escaped else 0
+        self._escaped = False
+        for match in _JSON_TOKEN_RE.finditer(chunk, skip):
+            i = match.start()
+            if i < skip:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == '\\':
+                    skip = i + 2
+                    self._escaped = skip > len(chunk)
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                # Quotes in the prose before the object do not open strings
+                self._in_string = self._depth > 0
+            elif char == '{':
+                if self._start < 0:
+                    self._start = offset + i
+                self._depth += 1
+            elif char == '}' and self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    return self.text[self._start:offset + i + 1]
+        return None
+
 class BedrockClient:
     def __init__(self, settings: Settings):
         self.client = boto3.client(
@@ -16,73 +110,138 @@ class BedrockClient:
             region_name=settings.aws_region
         )
         self.model_id = settings.bedrock_model_id
+        self.cache_dir = os.path.expanduser(settings.bedrock_cache_dir) if settings.bedrock_cache_dir else None
+        self._cache_writes = 0
         
     async def analyze_build(self, build: BuildInfo, last_success: Optional[BuildInfo] = None) -> BuildAnalysis:
         """Analyze a build using Amazon Bedrock LLM."""
         prompt = self._construct_analysis_prompt(build, last_success)
-        
         try:
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                contentType='application/json',
-                accept='application/json',
-                body=json.dumps({
-                    'prompt': prompt,
-                    'max_tokens_to_sample': 4000,
-                    'temperature': 0.7,
-                    'top_p': 0.8,
-                    'stop_sequences': ["\n\nHuman:"],
-                    'anthropic_version': 'bedrock-2023-05-31'
-                })
-            )
-            
-            response_body = json.loads(response['body'].read().decode())
-            
-            # Extract the JSON from Claude's response
-            completion = response_body.get('completion', '')
-            try:
-                # Find the JSON object in the completion
-                start = completion.find('{')
-                end = completion.rfind('}') + 1
-                if start >= 0 and end > start:
-                    analysis = json.loads(completion[start:end])
-                else:
-                    raise ValueError("No JSON found in response")
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Failed to parse LLM response as JSON: {str(e)}")
-                
+            # boto3 and the disk cache are blocking; keep the event loop free while
+            # the cache is read or the completion streams in
+            analysis = await asyncio.to_thread(self._cached_completion, prompt)
             return self._parse_analysis_response(analysis, build, last_success)
             
         except Exception as e:
             logger.error(f"Error invoking Bedrock model: {str(e)}")
             raise
     
-    def _construct_analysis_prompt(self, build: BuildInfo, last_success: Optional[BuildInfo] = None) -> str:
-        """Construct the prompt for build analysis."""
-        prompt = f"\n\nHuman: You are a Jenkins build analysis expert. Please analyze the following build failure and provide structured insights.\n\nJenkins Build Details:\nBuild: {build.job_name} #{build.build_number}\nResult: {build.result}\n\nBuild Console Log:\n{build.console_log}\n\n"
+    def _cached_completion(self, prompt: str) -> Dict[str, Any]:
+        """Return the cached analysis for a prompt, invoking the model on a miss."""
+        cache_key = self._cache_key(prompt)
+        analysis = self._load_cached(cache_key)
+        if analysis is None:
+            analysis = self._invoke_model(prompt)
+            self._store_cached(cache_key, analysis)
+        return analysis
+    
+    def _invoke_model(self, prompt: str) -> Dict[str, Any]:
+        """Stream a completion and return the JSON analysis as soon as it is complete."""
+        response = self.client.invoke_model_with_response_stream(
+            modelId=self.model_id,
+            contentType='application/json',
+            accept='application/json',
+            body=json.dumps({
+                'prompt': prompt,
+                'max_tokens_to_sample': 4000,
+                'temperature': 0.7,
+                'top_p': 0.8,
+                'stop_sequences': ["\n\nHuman:"],
+                'anthropic_version': 'bedrock-2023-05-31'
+            })
+        )
         
-        if last_success:
-            prompt += f"Last Successful Build #{last_success.build_number} Console Log for Comparison:\n{last_success.console_log}\n\n"
-            
-        prompt += """Please analyze this build and:
-1. Identify the main error patterns and their context
-2. Note key differences from the successful build
-3. Determine likely root causes
-4. Provide specific recommendations for fixing the issue
-5. Assign a severity level and confidence score
+        # Extract the JSON from Claude's response, stopping before the trailing prose
+        stream = response['body']
+        scanner = _JsonObjectScanner()
+        try:
+            for event in stream:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                completion = json.loads(chunk['bytes']).get('completion', '')
+                found = scanner.feed(completion)
+                if found is not None:
+                    try:
+                        return json.loads(found)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Failed to parse LLM response as JSON: {str(e)}")
+        finally:
+            stream.close()
+        raise ValueError("No JSON found in response")
+    
+    def _cache_key(self, prompt: str) -> str:
+        """Return the cache key for a prompt sent to the configured model."""
+        digest = hashlib.sha256(f"{CACHE_VERSION}\0{self.model_id}\0".encode())
+        digest.update(prompt.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
 
-Provide your analysis as a JSON object with these fields:
-{
-    "error_patterns": [{"pattern": "error pattern", "context": "surrounding context"}],
-    "differences": [{"type": "change type", "description": "what changed"}],
-    "recommendations": ["specific action 1", "specific action 2"],
-    "severity": "HIGH|MEDIUM|LOW",
-    "confidence": 0.0-1.0
-}
+    def _load_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a previously stored analysis for key, if any."""
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            with open(path, 'rb') as f:
+                analysis = json.load(f)
+            # Refresh the modification time so pruning drops least recently used entries
+            os.utime(path)
+            return analysis
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable Bedrock cache entry {key}: {str(e)}")
+            return None
 
-\n\nAssistant: I'll analyze the build and provide my findings in the requested JSON format.
-"""
-        return prompt
+    def _store_cached(self, key: str, analysis: Dict[str, Any]) -> None:
+        """Persist an analysis under key, atomically replacing any existing entry."""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(analysis, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{key}.json"))
+        except OSError as e:
+            logger.warning(f"Failed to write Bedrock cache entry {key}: {str(e)}")
+            return
+        self._cache_writes += 1
+        if self._cache_writes % BEDROCK_CACHE_PRUNE_EVERY == 0:
+            self._prune_cache()
+            
+    def _prune_cache(self) -> None:
+        """Delete the least recently used cache entries beyond BEDROCK_CACHE_MAX_ENTRIES."""
+        try:
+            with os.scandir(self.cache_dir) as it:
+                entries = [(entry.stat().st_mtime, entry.path) for entry in it if entry.name.endswith('.json')]
+        except OSError as e:
+            logger.warning(f"Failed to scan Bedrock cache: {str(e)}")
+            return
+        if len(entries) <= BEDROCK_CACHE_MAX_ENTRIES:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - BEDROCK_CACHE_MAX_ENTRIES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def _construct_analysis_prompt(self, build: BuildInfo, last_success: Optional[BuildInfo] = None) -> str:
+        """Construct the prompt for build analysis."""
+        parts = [
+            _PROMPT_HEAD % (build.job_name, build.build_number, build.result),
+            focus_log(build.console_log, PROMPT_LOG_CHARS),
+            "\n\n"
+        ]
+        if last_success:
+            parts += [
+                _PROMPT_LAST_SUCCESS % last_success.build_number,
+                focus_log(last_success.console_log, PROMPT_LOG_CHARS),
+                "\n\n"
+            ]
+        parts.append(_PROMPT_TAIL)
+        return "".join(parts)
     
     def _parse_analysis_response(self, analysis: Dict[str, Any], build: BuildInfo, 
                                last_success: Optional[BuildInfo]) -> BuildAnalysis:
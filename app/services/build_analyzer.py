@@ -1,10 +1,37 @@
 """Build analysis service that coordinates the analysis process."""
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
+from collections import deque
+from difflib import unified_diff
+import asyncio
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from cachetools import LRUCache
+from loguru import logger
 from app.services.jenkins_client import JenkinsClient
 from app.services.bedrock_client import BedrockClient
 from app.models.build import BuildInfo, BuildAnalysis, BuildComparison
+from app.utils.dicts import diff_dicts
+from app.utils.hashing import content_digest
+from app.utils.log_analyzer import error_windows
 from datetime import datetime
 
+# Environment variables parsed from console logs, keyed by log digest. The
+# last successful build's log is compared against every later failure.
+_env_vars_cache: LRUCache = LRUCache(maxsize=256)
+# Logs are compared in worker threads, and LRUCache is not thread-safe
+_env_vars_lock = threading.Lock()
+
+# KEY=value assignments with an upper-case key, one per line
+_ENV_RE = re.compile(r'^[ \t]*(?P<key>_*[A-Z][A-Z0-9_]{0,127})[ \t]*=(?P<value>.*)$', re.MULTILINE)
+
+# git's C histogram diff is used for log comparison when git is installed
+GIT_EXECUTABLE = shutil.which('git')
+GIT_DIFF_TIMEOUT = 60
+
 class BuildAnalyzer:
     def __init__(self, jenkins_client: JenkinsClient, bedrock_client: BedrockClient):
         self.jenkins = jenkins_client
@@ -21,7 +48,7 @@ class BuildAnalyzer:
             last_success = await self.jenkins.get_last_successful_build(job_name, build_number)
         elif build_info.result == 'IN_PROGRESS':
             # For in-progress builds, we'll analyze what we have so far
-            build_info.result = 'UNKNOWN'  # Set a valid result state for analysis
+            build_info = build_info.model_copy(update={'result': 'UNKNOWN'})  # Set a valid result state for analysis
             
         # Perform LLM analysis
         analysis = await self.bedrock.analyze_build(build_info, last_success)
@@ -46,13 +73,11 @@ class BuildAnalyzer:
             successful_build.parameters
         )
         
-        # Compare environment variables (extracted from build logs)
-        env_vars_failed = self._extract_env_vars(failed_build.console_log)
-        env_vars_success = self._extract_env_vars(successful_build.console_log)
-        env_diff = self._compare_dicts(env_vars_failed, env_vars_success)
-        
-        # Compare logs (focusing on error sections)
-        log_diff = self._compare_logs(failed_build.console_log, successful_build.console_log)
+        # Log parsing and diffing (including the git subprocess) run in a worker
+        # thread so a large log doesn't stall the event loop
+        env_diff, log_diff = await asyncio.to_thread(
+            self._compare_console_logs, failed_build.console_log, successful_build.console_log
+        )
         
         return BuildComparison(
             failed_build=failed_build,
@@ -65,44 +90,34 @@ class BuildAnalyzer:
     
     def _compare_dicts(self, dict1: dict, dict2: dict) -> dict:
         """Compare two dictionaries and return differences."""
-        diff = {}
-        all_keys = set(dict1.keys()) | set(dict2.keys())
+        return diff_dicts(dict1, dict2)
+    
+    def _compare_console_logs(self, failed_log: str, success_log: str) -> Tuple[dict, dict]:
+        """Return the environment variable and log differences between two builds."""
+        # Compare environment variables (extracted from build logs)
+        env_diff = self._compare_dicts(self._extract_env_vars(failed_log), self._extract_env_vars(success_log))
         
-        for key in all_keys:
-            if key not in dict1:
-                diff[key] = {'type': 'removed', 'old': dict2[key], 'new': None}
-            elif key not in dict2:
-                diff[key] = {'type': 'added', 'old': None, 'new': dict1[key]}
-            elif dict1[key] != dict2[key]:
-                diff[key] = {'type': 'changed', 'old': dict2[key], 'new': dict1[key]}
-                
-        return diff
+        # Compare logs (focusing on error sections)
+        return env_diff, self._compare_logs(failed_log, success_log)
     
     def _extract_env_vars(self, log: str) -> dict:
-        """Extract environment variables from build log."""
-        env_vars = {}
-        # Look for common environment variable patterns in log
-        # This is a simple implementation - could be enhanced with regex patterns
-        for line in log.splitlines():
-            if '=' in line and not line.strip().startswith('#'):
-                parts = line.split('=', 1)
-                if len(parts) == 2:
-                    key = parts[0].strip()
-                    if key.isupper():  # Most env vars are uppercase
-                        env_vars[key] = parts[1].strip()
+        """Extract environment variables from build log, memoized by log content."""
+        key = content_digest(log)
+        with _env_vars_lock:
+            env_vars = _env_vars_cache.get(key)
+        if env_vars is None:
+            env_vars = self._parse_env_vars(log)
+            with _env_vars_lock:
+                _env_vars_cache[key] = env_vars
         return env_vars
     
+    def _parse_env_vars(self, log: str) -> dict:
+        """Parse environment variable assignments out of a build log."""
+        # One regex pass over the whole log; later assignments win
+        return {match['key']: match['value'].strip() for match in _ENV_RE.finditer(log)}
+    
     def _compare_logs(self, failed_log: str, success_log: str) -> dict:
         """Compare build logs to identify key differences."""
-        from difflib import unified_diff
-        
-        # Split logs into lines
-        failed_lines = failed_log.splitlines()
-        success_lines = success_log.splitlines()
-        
-        # Generate unified diff
-        diff_lines = list(unified_diff(success_lines, failed_lines))
-        
         # Analyze the diff to find significant changes
         changes = {
             'added_lines': [],
@@ -110,13 +125,50 @@ class BuildAnalyzer:
             'error_contexts': []
         }
         
-        current_context = []
-        for line in diff_lines:
+        # Only lines mentioning errors are reported, so diff just the windows
+        # around error-like lines instead of the whole logs
+        success_excerpt = '\n'.join(error_windows(success_log))
+        failed_excerpt = '\n'.join(error_windows(failed_log))
+        
+        # Only the last 5 diff lines are ever quoted as context
+        current_context = deque(maxlen=5)
+        for line in self._diff_logs(success_excerpt, failed_excerpt):
             if line.startswith('+') and 'error' in line.lower():
                 changes['added_lines'].append(line[1:])
-                changes['error_contexts'].append(current_context[-5:])  # Last 5 lines of context
+                changes['error_contexts'].append(list(current_context))  # Last 5 lines of context
             elif line.startswith('-') and 'error' in line.lower():
                 changes['removed_lines'].append(line[1:])
             current_context.append(line)
             
         return changes
+    
+    def _diff_logs(self, old_log: str, new_log: str) -> Iterable[str]:
+        """Return unified diff lines between two logs, preferring git's histogram diff."""
+        if GIT_EXECUTABLE:
+            try:
+                return self._git_diff(old_log, new_log)
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.warning(f"git diff failed, falling back to difflib: {e}")
+        return unified_diff(old_log.splitlines(), new_log.splitlines())
+    
+    def _git_diff(self, old_log: str, new_log: str) -> List[str]:
+        """Diff two logs with git's histogram algorithm, which copes well with repetitive lines."""
+        with tempfile.TemporaryDirectory(prefix='build-diff-') as tmp_dir:
+            old_path = os.path.join(tmp_dir, 'success.log')
+            new_path = os.path.join(tmp_dir, 'failed.log')
+            for path, text in ((old_path, old_log), (new_path, new_log)):
+                with open(path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                    f.write(text)
+            result = subprocess.run(
+                [GIT_EXECUTABLE, 'diff', '--no-index', '--no-color', '--no-ext-diff',
+                 '--diff-algorithm=histogram', '-U3', old_path, new_path],
+                capture_output=True,
+                timeout=GIT_DIFF_TIMEOUT
+            )
+        # --no-index exits 1 when the files differ
+        if result.returncode not in (0, 1):
+            raise subprocess.SubprocessError(result.stderr.decode('utf-8', 'replace').strip())
+        lines = result.stdout.decode('utf-8', 'replace').splitlines()
+        # Drop git's file header so only hunks remain, as with difflib
+        start = next((i for i, line in enumerate(lines) if line.startswith('@@')), len(lines))
+        return lines[start:]
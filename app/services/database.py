@@ -1,16 +1,16 @@
 """Database service for the build analyzer."""
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 import os
 import asyncio
 from datetime import datetime, timedelta
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy import select, update, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, update, delete, bindparam
+from sqlalchemy.orm import selectinload, undefer
 from loguru import logger
 import alembic.config
 import alembic.command
 
-from app.models.database import Base, Build, Analysis, Pattern, Action
+from app.models.database import Base, Build, Analysis, Pattern, Action, create_db_engine
 from app.models.build import BuildInfo, BuildAnalysis
 from app.core.config import Settings
 
@@ -27,7 +27,7 @@ class DatabaseService:
             db_path = os.path.join(db_dir, "analyzer.db")
             db_url = f"sqlite+aiosqlite:///{db_path}"
             
-        self.engine = create_async_engine(db_url, echo=settings.log_level == "DEBUG")
+        self.engine = create_db_engine(db_url, echo=settings.log_level == "DEBUG")
         self.session_maker = async_sessionmaker(self.engine, class_=AsyncSession)
 
     async def init_db(self):
@@ -45,6 +45,10 @@ class DatabaseService:
             logger.error(f"Error running database migrations: {e}")
             raise
 
+    async def close(self):
+        """Dispose of the engine and its pooled connections."""
+        await self.engine.dispose()
+
     async def save_build(self, build_info: BuildInfo) -> int:
         """Save build information to the database."""
         async with self.session_maker() as session:
@@ -79,11 +83,52 @@ class DatabaseService:
             session.add(db_action)
             await session.commit()
             
+    async def save_builds(self, build_infos: List[BuildInfo]) -> List[int]:
+        """Save many builds in one transaction, returning their ids in input order."""
+        ids: List[int] = []
+        batch_size = self.settings.batch_size
+        async with self.session_maker() as session:
+            for start in range(0, len(build_infos), batch_size):
+                ids += await Build.bulk_insert(session, build_infos[start:start + batch_size], returning=True)
+            await session.commit()
+        return ids
+        
+    async def save_analyses(self, analyses: List[Tuple[BuildAnalysis, int, Optional[int]]]) -> None:
+        """Save many ``(analysis, build_id, last_success_id)`` triples in one transaction."""
+        if not analyses:
+            return
+        async with self.session_maker() as session:
+            session.add_all([
+                Analysis.from_build_analysis(analysis, build_id, last_success_id)
+                for analysis, build_id, last_success_id in analyses
+            ])
+            await session.commit()
+            
+    async def save_patterns(self, patterns: List[Tuple[str, Dict[str, Any]]]) -> List[int]:
+        """Save many ``(job_name, pattern_dict)`` pairs in one transaction, returning their ids."""
+        ids: List[int] = []
+        batch_size = self.settings.batch_size
+        async with self.session_maker() as session:
+            for start in range(0, len(patterns), batch_size):
+                ids += await Pattern.bulk_insert(session, patterns[start:start + batch_size], returning=True)
+            await session.commit()
+        return ids
+        
+    async def save_actions(self, actions: List[Tuple[int, Dict[str, Any], Optional[int]]]) -> None:
+        """Save many ``(build_id, action_dict, pattern_id)`` triples in one transaction."""
+        batch_size = self.settings.batch_size
+        async with self.session_maker() as session:
+            for start in range(0, len(actions), batch_size):
+                await Action.bulk_insert(session, actions[start:start + batch_size])
+            await session.commit()
+            
     async def get_build(self, job_name: str, build_number: int) -> Optional[BuildInfo]:
         """Get build information from the database."""
         async with self.session_maker() as session:
             result = await session.execute(
-                select(Build).where(
+                select(Build)
+                .options(undefer(Build.console_log))
+                .where(
                     Build.job_name == job_name,
                     Build.build_number == build_number
                 )
@@ -92,7 +137,8 @@ class DatabaseService:
             if not build:
                 return None
                 
-            return BuildInfo(
+            # Rows were validated on the way in, skip re-validation
+            return BuildInfo.model_construct(
                 job_name=build.job_name,
                 build_number=build.build_number,
                 result=build.result,
@@ -109,7 +155,7 @@ class DatabaseService:
             result = await session.execute(
                 select(Analysis)
                 .join(Build)
-                .options(selectinload(Analysis.build))
+                .options(selectinload(Analysis.build).undefer(Build.console_log))
                 .where(
                     Build.job_name == job_name,
                     Build.build_number == build_number
@@ -119,8 +165,9 @@ class DatabaseService:
             if not analysis:
                 return None
                 
-            return BuildAnalysis(
-                build_info=BuildInfo(
+            # Rows were validated on the way in, skip re-validation
+            return BuildAnalysis.model_construct(
+                build_info=BuildInfo.model_construct(
                     job_name=analysis.build.job_name,
                     build_number=analysis.build.build_number,
                     result=analysis.build.result,
@@ -146,14 +193,19 @@ class DatabaseService:
             if job_name:
                 query = query.where(Pattern.job_name == job_name)
                 
-            result = await session.execute(query)
-            patterns = result.scalars().all()
+            # Rows arrive grouped by job, so each group is appended to in one pass
+            result = await session.stream_scalars(
+                query.order_by(Pattern.job_name).execution_options(yield_per=500)
+            )
             
             pattern_dict: Dict[str, List[Dict[str, Any]]] = {}
-            for pattern in patterns:
-                if pattern.job_name not in pattern_dict:
-                    pattern_dict[pattern.job_name] = []
-                pattern_dict[pattern.job_name].append({
+            current_job = None
+            job_patterns: List[Dict[str, Any]] = []
+            async for pattern in result:
+                if pattern.job_name != current_job:
+                    current_job = pattern.job_name
+                    job_patterns = pattern_dict[current_job] = []
+                job_patterns.append({
                     'pattern': pattern.pattern,
                     'frequency': pattern.frequency,
                     'last_seen': pattern.last_seen,
@@ -162,6 +214,23 @@ class DatabaseService:
                 
             return pattern_dict
             
+    async def iter_patterns(self, job_name: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream active patterns from the database without buffering the whole result set."""
+        async with self.session_maker() as session:
+            query = select(Pattern).where(Pattern.is_active == True)
+            if job_name:
+                query = query.where(Pattern.job_name == job_name)
+                
+            result = await session.stream_scalars(query.execution_options(yield_per=1000))
+            async for pattern in result:
+                yield {
+                    'job_name': pattern.job_name,
+                    'pattern': pattern.pattern,
+                    'frequency': pattern.frequency,
+                    'last_seen': pattern.last_seen,
+                    'solution': pattern.solution
+                }
+            
     async def get_actions(self, job_name: Optional[str] = None,
                          build_number: Optional[int] = None,
                          limit: int = 100) -> List[Dict[str, Any]]:
@@ -191,6 +260,74 @@ class DatabaseService:
                 'timestamp': action.timestamp.isoformat()
             } for action in actions]
             
+    async def bulk_upsert_patterns(self, patterns: List[Tuple[str, Dict[str, Any], int]]) -> None:
+        """Insert or update ``(job_name, pattern_dict, frequency_delta)`` entries, matched on job and pattern text.
+
+        Existing rows have the delta added to their stored frequency and keep their
+        solution unless the pattern carries one, so a pattern recreated in memory
+        after eviction does not reset its history.
+        """
+        if not patterns:
+            return
+        # Later entries carry the newest state of a pattern; deltas accumulate
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        deltas: Dict[Tuple[str, str], int] = {}
+        for job_name, pattern, delta in patterns:
+            key = (job_name, pattern['pattern'])
+            latest[key] = pattern
+            deltas[key] = deltas.get(key, 0) + delta
+        
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(Pattern.job_name, Pattern.pattern).where(
+                    Pattern.job_name.in_({job_name for job_name, _ in latest}),
+                    Pattern.pattern.in_({pattern for _, pattern in latest})
+                )
+            )
+            existing = {tuple(row) for row in result}
+            
+            with_solution = []
+            without_solution = []
+            for (job_name, pattern_text), pattern in latest.items():
+                if (job_name, pattern_text) not in existing:
+                    continue
+                params = {
+                    'b_job_name': job_name,
+                    'b_pattern': pattern_text,
+                    'b_delta': deltas[(job_name, pattern_text)],
+                    'b_last_seen': pattern['last_seen']
+                }
+                if pattern.get('solution') is None:
+                    without_solution.append(params)
+                else:
+                    params['b_solution'] = pattern['solution']
+                    with_solution.append(params)
+                    
+            table = Pattern.__table__
+            update_row = (
+                table.update()
+                .where(
+                    table.c.job_name == bindparam('b_job_name'),
+                    table.c.pattern == bindparam('b_pattern')
+                )
+                .values(
+                    frequency=table.c.frequency + bindparam('b_delta'),
+                    last_seen=bindparam('b_last_seen'),
+                    is_active=True
+                )
+            )
+            if with_solution:
+                await session.execute(update_row.values(solution=bindparam('b_solution')), with_solution)
+            if without_solution:
+                await session.execute(update_row, without_solution)
+                
+            new = [(key[0], pattern) for key, pattern in latest.items() if key not in existing]
+            batch_size = self.settings.batch_size
+            for start in range(0, len(new), batch_size):
+                await Pattern.bulk_insert(session, new[start:start + batch_size])
+                
+            await session.commit()
+            
     async def cleanup_old_data(self, pattern_ttl_days: int = 30,
                              analysis_ttl_days: int = 7) -> None:
         """Clean up old data from the database."""
@@ -201,6 +338,7 @@ class DatabaseService:
                 update(Pattern)
                 .where(Pattern.last_seen < pattern_cutoff)
                 .values(is_active=False)
+                .execution_options(synchronize_session=False)
             )
             
             # Delete old analyses
@@ -208,6 +346,7 @@ class DatabaseService:
             await session.execute(
                 delete(Analysis)
                 .where(Analysis.timestamp < analysis_cutoff)
+                .execution_options(synchronize_session=False)
             )
             
             await session.commit()
@@ -1,11 +1,38 @@
 """Jenkins API client service for interacting with Jenkins server."""
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import threading
 import jenkins
 import requests
+from cachetools import TTLCache
 from app.core.config import Settings
 from app.models.build import BuildInfo
 from datetime import datetime
 
+# Job API path with a tree filter; Jenkins returns only the requested fields
+JOB_TREE = '%(folder_url)sjob/%(short_name)s/api/json?tree=%(tree)s'
+
+# Job hierarchy three levels deep (e.g. organization/repository/branch) in one request
+JOBS_TREE = 'api/json?tree=jobs[name,_class,jobs[name,_class,jobs[name,_class]]]'
+
+# The same three-level hierarchy rooted at a folder
+FOLDER_JOBS_TREE = '%(folder_url)sjob/%(short_name)s/' + JOBS_TREE
+
+# Plain-text console log of a build
+CONSOLE_TEXT = '%(folder_url)sjob/%(short_name)s/%(number)s/consoleText'
+
+# Prefixed to console logs fetched only in part
+CONSOLE_TRUNCATED_MARKER = '[... earlier console output not fetched ...]\n'
+
+# Job metadata is shared by bursts of analyses on the same job for this long
+JOB_INFO_TTL = 30
+JOB_INFO_CACHE_SIZE = 512
+
+T = TypeVar('T')
+
 class JenkinsClient:
     def __init__(self, settings: Settings):
         self.server = jenkins.Jenkins(
@@ -13,10 +40,42 @@ class JenkinsClient:
             username=settings.jenkins_user,
             password=settings.jenkins_token
         )
+        # Validators from the last job listing, for conditional requests
+        self._jobs_etag: Optional[str] = None
+        self._jobs_last_modified: Optional[str] = None
+        self._job_info_cache: TTLCache = TTLCache(maxsize=JOB_INFO_CACHE_SIZE, ttl=JOB_INFO_TTL)
+        # Blocking calls run in worker threads; TTLCache is not thread-safe
+        self._job_info_lock = threading.Lock()
+        self.console_tail_bytes = settings.console_tail_bytes
+        # python-jenkins is blocking; its requests run here, bounded to what Jenkins handles well
+        self._pool = ThreadPoolExecutor(
+            max_workers=settings.jenkins_concurrency,
+            thread_name_prefix='jenkins'
+        )
+        
+    async def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking Jenkins call on the client's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+        
+    def close(self) -> None:
+        """Shut down the request thread pool."""
+        self._pool.shutdown(wait=False)
         
     async def get_build_info(self, job_name: str, build_number: int) -> BuildInfo:
-        """Get detailed information about a specific build."""
-        build = self.server.get_build_info(job_name, build_number)
+        """Get detailed information about a specific build.
+
+        Only the tail of the console log is fetched unless console_tail_bytes is 0.
+        """
+        if not self.console_tail_bytes:
+            get_console = functools.partial(self.server.get_build_console_output, job_name, build_number)
+        else:
+            get_console = functools.partial(self.get_console_tail, job_name, build_number, self.console_tail_bytes)
+        # Build metadata and console output are independent requests
+        build, console_log = await asyncio.gather(
+            self.call(self.server.get_build_info, job_name, build_number),
+            self.call(get_console)
+        )
         
         # Handle None result - build might be in progress or unknown state
         result = build['result']
@@ -34,17 +93,110 @@ class JenkinsClient:
             duration=build['duration'] or 0,  # Handle None duration
             parameters=self._extract_parameters(build),
             url=build['url'],
-            console_log=self.server.get_build_console_output(job_name, build_number)
+            console_log=console_log
         )
     
+    def get_console_tail(self, job_name: str, build_number: int, max_bytes: int) -> str:
+        """Fetch at most the last max_bytes of a build's console log with a Range request."""
+        folder_url, short_name = self.server._get_job_folder(job_name)
+        url = self.server._build_url(CONSOLE_TEXT, {
+            'folder_url': folder_url,
+            'short_name': short_name,
+            'number': build_number
+        })
+        try:
+            response = self.server.jenkins_request(
+                requests.Request('GET', url, headers={'Range': f'bytes=-{max_bytes}'})
+            )
+        except requests.HTTPError as e:
+            # Some proxies reject suffix ranges; fall back to the whole log
+            if e.response is None or e.response.status_code != 416:
+                raise
+            return self.server.get_build_console_output(job_name, build_number)
+            
+        # Servers that ignore Range answer 200 with the whole log
+        content_range = response.headers.get('Content-Range', '')
+        if response.status_code != 206 or content_range.startswith('bytes 0-'):
+            return response.text
+        # Drop the partial first line; it may also split a multi-byte character
+        data = response.content
+        data = data[data.find(b'\n') + 1:]
+        return CONSOLE_TRUNCATED_MARKER + data.decode(response.encoding or 'utf-8', 'replace')
+        
+    def _get_job_tree(self, job_name: str, tree: str) -> Dict[str, Any]:
+        """Fetch only the fields named by a Jenkins tree filter for a job."""
+        folder_url, short_name = self.server._get_job_folder(job_name)
+        url = self.server._build_url(JOB_TREE, {
+            'folder_url': folder_url,
+            'short_name': short_name,
+            'tree': tree
+        })
+        response = self.server.jenkins_open(requests.Request('GET', url))
+        if not response:
+            raise jenkins.JenkinsException(f"job[{job_name}] does not exist")
+        return json.loads(response)
+        
+    def _job_info(self, job_name: str) -> Dict[str, Any]:
+        """Get a job's metadata, reusing a recent fetch."""
+        with self._job_info_lock:
+            job_info = self._job_info_cache.get(job_name)
+        if job_info is None:
+            job_info = self.server.get_job_info(job_name)
+            with self._job_info_lock:
+                self._job_info_cache[job_name] = job_info
+        return job_info
+        
+    def invalidate_job_info(self, job_name: str) -> None:
+        """Drop cached metadata for a job, e.g. after it was reconfigured."""
+        with self._job_info_lock:
+            self._job_info_cache.pop(job_name, None)
+        
+    def get_last_build_number(self, job_name: str) -> Optional[int]:
+        """Get the number of the job's most recent build, if any."""
+        last_build = self._get_job_tree(job_name, 'lastBuild[number]').get('lastBuild')
+        return last_build['number'] if last_build else None
+    
+    def get_jobs_tree(self) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the job hierarchy, or None if Jenkins reports it unchanged since the last fetch."""
+        headers = {}
+        if self._jobs_etag:
+            headers['If-None-Match'] = self._jobs_etag
+        if self._jobs_last_modified:
+            headers['If-Modified-Since'] = self._jobs_last_modified
+        response = self.server.jenkins_request(
+            requests.Request('GET', self.server._build_url(JOBS_TREE), headers=headers)
+        )
+        if response.status_code == 304:
+            return None
+        self._jobs_etag = response.headers.get('ETag')
+        self._jobs_last_modified = response.headers.get('Last-Modified')
+        return response.json().get('jobs', [])
+    
+    def get_folder_jobs_tree(self, folder_name: str) -> List[Dict[str, Any]]:
+        """Fetch the job hierarchy below a folder."""
+        folder_url, short_name = self.server._get_job_folder(folder_name)
+        url = self.server._build_url(FOLDER_JOBS_TREE, {
+            'folder_url': folder_url,
+            'short_name': short_name
+        })
+        response = self.server.jenkins_open(requests.Request('GET', url))
+        return json.loads(response).get('jobs', []) if response else []
+    
     async def get_last_successful_build(self, job_name: str, current_build: int) -> Optional[BuildInfo]:
         """Get the last successful build before the specified build number."""
-        job_info = self.server.get_job_info(job_name)
-        for build in job_info['builds']:
-            if build['number'] >= current_build:
-                continue
-            build_info = self.server.get_build_info(job_name, build['number'])
-            if build_info['result'] == 'SUCCESS':
+        # Usually the job's lastSuccessfulBuild is already older than the current build
+        job_tree = await self.call(self._get_job_tree, job_name, 'lastSuccessfulBuild[number]')
+        last_success = job_tree.get('lastSuccessfulBuild')
+        if last_success is None:
+            return None
+        if last_success['number'] < current_build:
+            return await self.get_build_info(job_name, last_success['number'])
+            
+        # A newer build succeeded; scan the build list for one before current_build
+        job_tree = await self.call(self._get_job_tree, job_name, 'builds[number,result]')
+        builds = job_tree.get('builds', [])
+        for build in builds:
+            if build['number'] < current_build and build['result'] == 'SUCCESS':
                 return await self.get_build_info(job_name, build['number'])
         return None
     
@@ -54,7 +206,9 @@ class JenkinsClient:
         #     self.server.set_build_description(job_name, build_number, description)
         # except jenkins.JenkinsException as e:
         #     # Fall back to updating via direct API if set_build_description is not available
-        job_info = self.server.get_job_info(job_name)
+        
+        # Build descriptions are not part of the job metadata, so the cache stays valid
+        job_info = self._job_info(job_name)
         if 'url' in job_info:
             build_url = f"{job_info['url']}{build_number}/submitDescription"
             self.server.jenkins_open(
@@ -0,0 +1,15 @@
+"""Coarse wall-clock helpers."""
+from typing import Tuple
+from datetime import datetime
+import time
+
+# (monotonic time of last refresh, ISO timestamp)
+_ts_cache: Tuple[float, str] = (float("-inf"), "")
+
+def now_iso() -> str:
+    """Return the current time as an ISO string, refreshed at most once a second."""
+    global _ts_cache
+    now = time.monotonic()
+    if now - _ts_cache[0] >= 1.0:
+        _ts_cache = (now, datetime.now().isoformat())
+    return _ts_cache[1]
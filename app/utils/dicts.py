@@ -0,0 +1,18 @@
+"""Dictionary helpers."""
+from typing import Any, Dict
+
+_MISSING = object()
+
+def diff_dicts(current: Dict[Any, Any], previous: Dict[Any, Any]) -> Dict[Any, Dict[str, Any]]:
+    """Describe keys added, removed or changed in ``current`` relative to ``previous``."""
+    diff = {}
+    # One lookup per key in the common case; removed keys come from a view difference
+    for key, new in current.items():
+        old = previous.get(key, _MISSING)
+        if old is _MISSING:
+            diff[key] = {'type': 'added', 'old': None, 'new': new}
+        elif new != old:
+            diff[key] = {'type': 'changed', 'old': old, 'new': new}
+    for key in previous.keys() - current.keys():
+        diff[key] = {'type': 'removed', 'old': previous[key], 'new': None}
+    return diff
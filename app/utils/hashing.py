@@ -0,0 +1,13 @@
+"""Hashing helpers for cache keys."""
+from typing import Any
+import hashlib
+import orjson
+
+def content_digest(text: str) -> bytes:
+    """Return a compact digest of text, suitable as a cache key."""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+def stable_digest(value: Any) -> bytes:
+    """Return a digest of a JSON-like value that is stable across key order and runs."""
+    data = orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return hashlib.blake2b(data, digest_size=16).digest()
@@ -1,38 +1,186 @@
 """Utility functions for log processing and analysis."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, FrozenSet, Iterable, Optional, Tuple
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
 import re
+from loguru import logger
 
-def extract_error_patterns(log: str) -> List[Dict[str, Any]]:
-    """Extract error patterns and their context from a build log."""
-    error_patterns = []
+# Lines that mark the interesting parts of a log for comparison
+_ERROR_LINE_RE = re.compile(r'error|fail|exception|traceback', re.IGNORECASE)
+
+# Patterns below are compiled once at import rather than looked up in re's cache per call
+
+# Common error patterns to look for (error:, exception:, failure:, failed, BUILD FAILED
+# and [ERROR]), as one alternation so each line is searched once. Only the first four
+# are case-insensitive, hence the scoped flag. Alternatives are grouped by their leading
+# literal so each first character is tried once, and the lookahead lists every possible
+# first character so re can skip ahead to candidates.
+_ERROR_PATTERN = re.compile(
+    r'(?=[EeFfB\[])(?:(?i:e(?:rror:|xception:)|fail(?:ure:|ed))|BUILD FAILED|\[ERROR\])'
+)
+
+# Characters str.splitlines() treats as line breaks
+_LINE_BREAKS = '\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029'
+
+# Common test failure patterns
+_FAILED_TEST_PATTERNS = [re.compile(pattern) for pattern in (
+    r'Tests run: (\d+), Failures: (\d+), Errors: (\d+), Skipped: (\d+)',  # JUnit pattern
+    r'FAIL: ([\w\.]+)'  # Simple test failure pattern
+)]
+
+# Maven lists failed tests one per indented line after this header
+_MAVEN_FAILED_TESTS = 'Failed tests:'
+_MAVEN_FAILED_TEST_RE = re.compile(r'\n\s+([\w\.]+)')
+
+# Build timing patterns
+_TIME_PATTERNS = [re.compile(pattern) for pattern in (
+    r'Total time: ([\d\.]+) s',  # Maven pattern
+    r'Finished: (\w+) \(at (.*)\) \[([\d\.]+) s\]',  # Jenkins pattern
+    r'BUILD (\w+) in ([\d\.]+)s'  # Gradle pattern
+)]
+# Phase names are capped at 200 characters so lines with many [tags] can't make
+# each one scan to the end of the line
+_PHASE_PATTERN = re.compile(r'\[(\w+)\] (.{0,200}?) \[([\d\.]+)s\]')
+# Every phase timing ends with this; its "[" prefix alone matches nearly every line
+_PHASE_SUFFIX = 's]'
+
+# Common dependency issue patterns
+_DEP_PATTERNS = [re.compile(pattern) for pattern in (
+    r'Could not resolve dependencies for project (.*?): Failed to collect dependencies for \[(.*?)\]',
+    r'Could not find artifact (.*?) in (.*)',
+    r'Failed to resolve: (.*?)\n',
+    r'Unable to find version (.*?) for package (.*)'
+)]
+
+# Common compilation issue patterns. They start at the file extension rather than with
+# ^.*? so re can skip to candidate dots; the message still runs from the line start.
+_COMPILE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'\.(?:java|groovy|kt):\[(\d+),(\d+)\] error: ([^\n]*)',  # Java/Groovy/Kotlin
+    r'\.py:\d+: ([^\n]*)',  # Python
+    r'\.(?:ts|js):(\d+):(\d+): error (TS\d+: [^\n]*)'  # TypeScript/JavaScript
+)]
+
+def _error_line_ranges(lines: List[str], radius: int) -> Iterable[Tuple[int, int]]:
+    """Yield merged, ordered [start, end) line ranges within radius lines of an error-like line."""
+    start = end = 0
+    for i, line in enumerate(lines):
+        if _ERROR_LINE_RE.search(line):
+            if i - radius > end:
+                if end > start:
+                    yield start, end
+                start = i - radius
+            end = min(len(lines), i + radius + 1)
+    if end > start:
+        yield start, end
+
+def error_windows(log: str, radius: int = 5) -> List[str]:
+    """Return the log lines within radius lines of an error-like line, in order."""
     lines = log.splitlines()
+    kept = []
+    for start, end in _error_line_ranges(lines, radius):
+        kept.extend(lines[start:end])
+    return kept
+
+def focus_log(log: str, max_chars: int = 32_768, radius: int = 50, tail_chars: int = 4_096) -> str:
+    """Shrink a long log to its error regions plus its final lines, marking what was left out.
+
+    Logs of at most max_chars are returned unchanged.
+    """
+    if len(log) <= max_chars:
+        return log
+    lines = log.splitlines()
+    parts = []
+    shown = 0  # first line not yet shown or skipped over
+    for start, end in _error_line_ranges(lines, radius):
+        if start > shown:
+            parts.append(f"[... {start - shown} lines omitted ...]")
+        parts.extend(lines[start:end])
+        shown = end
+    excerpt = '\n'.join(parts)
     
-    # Common error patterns to look for
-    patterns = [
-        r'(?i)error:.*',
-        r'(?i)exception:.*',
-        r'(?i)failure:.*',
-        r'(?i)failed.*',
-        r'BUILD FAILED',
-        r'\[ERROR\].*',
-    ]
+    # The end of the log usually holds the final failure summary
+    tail = log[-tail_chars:]
+    tail = tail[tail.find('\n') + 1:]
+    budget = max_chars - len(tail)
+    if len(excerpt) > budget:
+        # Keep the earliest errors, which are the likeliest root causes
+        excerpt = excerpt[:budget]
+    return f"{excerpt}\n[... log truncated, final lines follow ...]\n{tail}"
+
+@dataclass
+class ErrorMatch:
+    """A distinct log line matching an error pattern, where it first appears and how often."""
+    # Declared by hand: dataclass(slots=True) needs Python 3.10
+    __slots__ = ('pattern', 'line_number', 'context_span', 'count')
+    pattern: str
+    line_number: int
+    context_span: Tuple[int, int]
+    count: int
     
-    for i, line in enumerate(lines):
-        for pattern in patterns:
-            if re.search(pattern, line):
-                # Get context (5 lines before and after)
-                start = max(0, i - 5)
-                end = min(len(lines), i + 6)
-                context = lines[start:end]
-                
-                error_patterns.append({
-                    'pattern': line,
-                    'context': '\n'.join(context),
-                    'line_number': i + 1
-                })
-                break
-                
-    return error_patterns
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the match as a JSON-serializable dict."""
+        return {
+            'pattern': self.pattern,
+            'line_number': self.line_number,
+            'context_span': self.context_span,
+            'count': self.count
+        }
+
+def extract_error_patterns(log: str, max_matches: int = 10_000) -> List[ErrorMatch]:
+    """Extract distinct error lines and the offsets of their first context from a build log.
+
+    Repeats of a line only increase its count. After max_matches distinct lines,
+    further new lines are dropped, with a warning, while repeats of the kept ones
+    are still counted.
+    """
+    error_patterns: Dict[str, ErrorMatch] = {}
+    dropped = 0
+    lines = log.splitlines(keepends=True)
+    # Offset of every line start, plus the end of the log
+    starts = list(accumulate(map(len, lines), initial=0))
+    
+    for i in _matching_line_indexes(log, starts):
+        line = lines[i].rstrip(_LINE_BREAKS)
+        seen = error_patterns.get(line)
+        if seen is not None:
+            seen.count += 1
+            continue
+        if len(error_patterns) >= max_matches:
+            dropped += 1
+            continue
+        # Context spans 5 lines before and after, without the final line break
+        last = min(len(lines), i + 6) - 1
+        error_patterns[line] = ErrorMatch(
+            line,
+            i + 1,
+            (starts[max(0, i - 5)], starts[last] + len(lines[last].rstrip(_LINE_BREAKS))),
+            1
+        )
+        
+    if dropped:
+        logger.warning(f"Error pattern extraction stopped at {max_matches} distinct lines; {dropped} further matching lines were dropped")
+    return list(error_patterns.values())
+
+def get_context(log: str, error_match: ErrorMatch) -> str:
+    """Return the context text of an extract_error_patterns entry."""
+    start, end = error_match.context_span
+    return log[start:end]
+
+def _matching_line_indexes(log: str, starts: List[int]) -> Iterable[int]:
+    """Yield the index of each line of log matching _ERROR_PATTERN."""
+    # One search over the whole log instead of a Python-level call per line; after
+    # a hit, resume at the next line so each line is reported once
+    pos = 0
+    while True:
+        match = _ERROR_PATTERN.search(log, pos)
+        if match is None:
+            return
+        line_index = bisect_right(starts, match.start()) - 1
+        yield line_index
+        pos = starts[line_index + 1]
 
 def analyze_test_failures(log: str) -> Dict[str, Any]:
     """Analyze test failures from build log."""
@@ -44,14 +192,8 @@ def analyze_test_failures(log: str) -> Dict[str, Any]:
     }
     
     # Look for common test failure patterns
-    failed_test_patterns = [
-        r'Tests run: (\d+), Failures: (\d+), Errors: (\d+), Skipped: (\d+)',  # JUnit pattern
-        r'FAIL: ([\w\.]+)',  # Simple test failure pattern
-        r'Failed tests:(\n\s+[\w\.]+)*'  # Maven test failure pattern
-    ]
-    
-    for pattern in failed_test_patterns:
-        matches = re.finditer(pattern, log)
+    for pattern in _FAILED_TEST_PATTERNS:
+        matches = pattern.finditer(log)
         for match in matches:
             if len(match.groups()) == 4:  # JUnit style result
                 test_results['failure_count'] += int(match.group(2))
@@ -60,6 +202,16 @@ def analyze_test_failures(log: str) -> Dict[str, Any]:
             else:  # Individual test failure
                 test_results['failed_tests'].append(match.group(1))
                 
+    # Walk the Maven list a line at a time instead of with a repeated group, which
+    # backtracks on near misses and only captures the last entry
+    pos = log.find(_MAVEN_FAILED_TESTS)
+    while pos >= 0:
+        match = _MAVEN_FAILED_TEST_RE.match(log, pos + len(_MAVEN_FAILED_TESTS))
+        while match:
+            test_results['failed_tests'].append(match.group(1))
+            match = _MAVEN_FAILED_TEST_RE.match(log, match.end())
+        pos = log.find(_MAVEN_FAILED_TESTS, pos + len(_MAVEN_FAILED_TESTS))
+        
     return test_results
 
 def analyze_build_time(log: str) -> Dict[str, Any]:
@@ -71,23 +223,17 @@ def analyze_build_time(log: str) -> Dict[str, Any]:
     }
     
     # Look for build timing patterns
-    time_patterns = [
-        r'Total time: ([\d\.]+) s',  # Maven pattern
-        r'Finished: (\w+) \(at (.*)\) \[([\d\.]+) s\]',  # Jenkins pattern
-        r'BUILD (\w+) in ([\d\.]+)s'  # Gradle pattern
-    ]
-    
-    for pattern in time_patterns:
-        matches = re.finditer(pattern, log)
+    for pattern in _TIME_PATTERNS:
+        matches = pattern.finditer(log)
         for match in matches:
             if match.groups():
                 time = float(match.groups()[-1])
                 if not timing_info['total_time'] or time > timing_info['total_time']:
                     timing_info['total_time'] = time
                     
-    # Analyze individual phase times
-    phase_pattern = r'\[(\w+)\] (.*?) \[([\d\.]+)s\]'
-    for match in re.finditer(phase_pattern, log):
+    # Analyze individual phase times, skipping the scan when no line can match
+    phase_matches = _PHASE_PATTERN.finditer(log) if _PHASE_SUFFIX in log else ()
+    for match in phase_matches:
         phase = match.group(2)
         time = float(match.group(3))
         timing_info['phase_times'][phase] = time
@@ -106,15 +252,8 @@ def analyze_dependency_issues(log: str) -> List[Dict[str, Any]]:
     dependency_issues = []
     
     # Common dependency issue patterns
-    patterns = [
-        r'Could not resolve dependencies for project (.*?): Failed to collect dependencies for \[(.*?)\]',
-        r'Could not find artifact (.*?) in (.*)',
-        r'Failed to resolve: (.*?)\n',
-        r'Unable to find version (.*?) for package (.*)'
-    ]
-    
-    for pattern in patterns:
-        matches = re.finditer(pattern, log)
+    for pattern in _DEP_PATTERNS:
+        matches = pattern.finditer(log)
         for match in matches:
             dependency_issues.append({
                 'type': 'dependency_error',
@@ -129,21 +268,79 @@ def analyze_compilation_issues(log: str) -> List[Dict[str, Any]]:
     compilation_issues = []
     
     # Common compilation issue patterns
-    patterns = [
-        r'(?m)^.*?\.(?:java|groovy|kt):\[(\d+),(\d+)\] error: (.*?)$',  # Java/Groovy/Kotlin
-        r'(?m)^.*?\.(?:py):\d+: (.*?)$',  # Python
-        r'(?m)^.*?\.(?:ts|js):\d+:\d+: error (TS\d+): (.*?)$'  # TypeScript/JavaScript
-    ]
-    
-    for pattern in patterns:
-        matches = re.finditer(pattern, log)
+    for pattern in _COMPILE_PATTERNS:
+        matches = pattern.finditer(log)
         for match in matches:
+            line_start = log.rfind('\n', 0, match.start()) + 1
             compilation_issues.append({
                 'type': 'compilation_error',
-                'message': match.group(0),
+                'message': log[line_start:match.end()],
                 'line': int(match.group(1)) if len(match.groups()) > 1 else None,
                 'column': int(match.group(2)) if len(match.groups()) > 2 else None,
                 'error': match.group(3) if len(match.groups()) > 2 else match.group(1)
             })
             
     return compilation_issues
+
+def analyze_log(log: str) -> Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Run the test, timing, dependency and compilation analyzers over a build log."""
+    # Kept as separate scans: each pattern starts with a literal re can skip ahead to,
+    # which a single alternation of all of them would lose
+    return (
+        analyze_test_failures(log),
+        analyze_build_time(log),
+        analyze_dependency_issues(log),
+        analyze_compilation_issues(log)
+    )
+
+def analyze_log_file(path: str) -> Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Run analyze_log over a console log saved on disk."""
+    with open(path, encoding='utf-8', errors='replace') as log_file:
+        return analyze_log(log_file.read())
+
+def analyze_log_files(paths: Iterable[str], max_workers: Optional[int] = None) -> List[Tuple[Any, ...]]:
+    """Analyze saved console logs in parallel worker processes, in input order."""
+    # The regex scans hold the GIL, so threads don't help here. Workers get paths and
+    # read the files themselves so that logs are never pickled between processes.
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(analyze_log_file, paths))
+
+# Compiled literal unions kept for reuse; matchers are rebuilt from an unchanged
+# literal set whenever a job's patterns are reloaded or reindexed
+_LITERAL_UNION_CACHE_SIZE = 64
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    """Render a character trie as a regex that shares common prefixes."""
+    prefix = []
+    keys = [key for key in node if key]
+    # Collapse single-child chains into plain literals
+    while len(keys) == 1 and '' not in node:
+        prefix.append(re.escape(keys[0]))
+        node = node[keys[0]]
+        keys = [key for key in node if key]
+    if not keys:
+        return ''.join(prefix)
+    group = '(?:' + '|'.join(re.escape(key) + _trie_pattern(node[key]) for key in sorted(keys)) + ')'
+    if '' in node:
+        group += '?'
+    return ''.join(prefix) + group
+
+def compile_literal_union(literals: Iterable[str]) -> "re.Pattern[str]":
+    """Compile literal strings into one trie-shaped regex.
+
+    Alternatives sharing a prefix are tried once, and at each position the
+    longest literal wins. finditer reports non-overlapping matches, so a
+    literal that only occurs inside a longer match is not reported.
+    """
+    return _compile_literal_set(frozenset(literal for literal in literals if literal))
+
+@lru_cache(maxsize=_LITERAL_UNION_CACHE_SIZE)
+def _compile_literal_set(literals: FrozenSet[str]) -> "re.Pattern[str]":
+    """Build and compile the trie regex for a set of non-empty literals."""
+    trie: Dict[str, Any] = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return re.compile(_trie_pattern(trie) if trie else r'(?!)')
@@ -1,21 +1,54 @@
 #!/usr/bin/env python3
 """Database management script for the Jenkins Build Analyzer."""
 import asyncio
+import atexit
+from functools import lru_cache
+from typing import Awaitable, TypeVar
 import typer
 from loguru import logger
 
-from app.core.config import Settings
-from app.services.database import DatabaseService
-
 app = typer.Typer()
 
+T = TypeVar("T")
+
+@lru_cache(maxsize=1)
+def _db():
+    """Return the database service, importing SQLAlchemy only for commands that use it."""
+    from app.core.config import get_settings
+    from app.services.database import DatabaseService
+    
+    return DatabaseService(get_settings())
+
+@lru_cache(maxsize=1)
+def _alembic_config():
+    """Return the Alembic configuration for this project."""
+    from alembic.config import Config
+    
+    return Config("alembic.ini")
+
+@lru_cache(maxsize=1)
+def _loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop shared by commands, so pooled connections stay usable."""
+    loop = asyncio.new_event_loop()
+    atexit.register(_shutdown, loop)
+    return loop
+
+def _shutdown(loop: asyncio.AbstractEventLoop) -> None:
+    """Dispose of the database engine, if one was built, and close the shared loop."""
+    if _db.cache_info().currsize:
+        loop.run_until_complete(_db().close())
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+
+def _run(operation: Awaitable[T]) -> T:
+    """Run a database operation on the shared event loop."""
+    return _loop().run_until_complete(operation)
+
 @app.command()
 def init():
     """Initialize the database and run all migrations."""
     try:
-        settings = Settings()
-        db = DatabaseService(settings)
-        asyncio.run(db.init_db())
+        _run(_db().init_db())
         typer.echo("Database initialized successfully")
     except Exception as e:
         typer.echo(f"Error initializing database: {e}", err=True)
@@ -24,12 +57,10 @@ def init():
 @app.command()
 def status():
     """Show current migration status."""
-    from alembic.config import Config
     from alembic.command import current
     
     try:
-        alembic_cfg = Config("alembic.ini")
-        current(alembic_cfg)
+        current(_alembic_config())
     except Exception as e:
         typer.echo(f"Error checking migration status: {e}", err=True)
         raise typer.Exit(1)
@@ -37,12 +68,10 @@ def status():
 @app.command()
 def migrate():
     """Run database migrations."""
-    from alembic.config import Config
     from alembic.command import upgrade
     
     try:
-        alembic_cfg = Config("alembic.ini")
-        upgrade(alembic_cfg, "head")
+        upgrade(_alembic_config(), "head")
         typer.echo("Database migrations completed successfully")
     except Exception as e:
         typer.echo(f"Error running migrations: {e}", err=True)
@@ -51,12 +80,10 @@ def migrate():
 @app.command()
 def rollback():
     """Rollback the last migration."""
-    from alembic.config import Config
     from alembic.command import downgrade
     
     try:
-        alembic_cfg = Config("alembic.ini")
-        downgrade(alembic_cfg, "-1")
+        downgrade(_alembic_config(), "-1")
         typer.echo("Successfully rolled back last migration")
     except Exception as e:
         typer.echo(f"Error rolling back migration: {e}", err=True)
@@ -66,9 +93,7 @@ def rollback():
 def cleanup(pattern_ttl_days: int = 30, analysis_ttl_days: int = 7):
     """Clean up old data from the database."""
     try:
-        settings = Settings()
-        db = DatabaseService(settings)
-        asyncio.run(db.cleanup_old_data(pattern_ttl_days, analysis_ttl_days))
+        _run(_db().cleanup_old_data(pattern_ttl_days, analysis_ttl_days))
         typer.echo("Database cleanup completed successfully")
     except Exception as e:
         typer.echo(f"Error cleaning up database: {e}", err=True)